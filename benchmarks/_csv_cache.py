@@ -0,0 +1,102 @@
+"""
+Chargement partage du CSV de resultats de benchmark
+
+Ce module est utilise par generate_graphs.py et generate_report_pdf.py :
+le fichier n'est lu qu'une fois par processus (run_all enchaine graphiques
+et rapport sur le meme CSV). Le cache est indexe par (chemin, date de
+modification) : un CSV reecrit est automatiquement relu.
+
+Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
+"""
+
+import os
+import csv
+from functools import lru_cache
+from operator import itemgetter
+from typing import NamedTuple
+
+import numpy as np
+
+
+class ResultEntry(NamedTuple):
+    """Une entree de resultat (une ligne du CSV)."""
+    image: str
+    algorithm: str
+    connectivity: int
+    runs: int
+    mean_time: float
+    std_time: float
+    min_time: float
+    max_time: float
+    num_components: int
+
+
+# Type numpy de chaque champ de ResultEntry (meme ordre que les colonnes
+# du fichier) : les noms des champs du tableau sont ceux de ResultEntry
+RESULT_DTYPE = list(zip(ResultEntry._fields, [
+    'U128',  # image
+    'U32',   # algorithm
+    'i1',    # connectivity
+    'i4',    # runs
+    'f8',    # mean_time
+    'f8',    # std_time
+    'f8',    # min_time
+    'f8',    # max_time
+    'i4',    # num_components
+]))
+
+# Colonne du CSV lue pour chaque champ de ResultEntry
+CSV_COLUMNS = ('image', 'algorithm', 'connectivity', 'runs',
+               'mean_time_ms', 'std_time_ms', 'min_time_ms', 'max_time_ms',
+               'num_components')
+
+
+@lru_cache(maxsize=4)
+def _load_csv_cached(filepath: str, mtime: float) -> np.recarray:
+    """
+    Lit le CSV (voir load_csv) ; `mtime` ne sert qu'a la cle du cache.
+    """
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        num_lines = sum(1 for _ in f)
+        f.seek(0)
+
+        reader = csv.reader(f)
+        header = next(reader, None) or CSV_COLUMNS
+
+        # Extraction positionnelle des colonnes (dans l'ordre de
+        # ResultEntry), quel que soit leur ordre dans le fichier
+        fields = itemgetter(*[header.index(column) for column in CSV_COLUMNS])
+
+        data = np.empty(max(num_lines - 1, 0), dtype=RESULT_DTYPE)
+        count = 0
+        for row in reader:
+            if row:
+                data[count] = fields(row)
+                count += 1
+
+    data = data[:count].view(np.recarray)
+    # Tableau partage entre appelants : lecture seule
+    data.flags.writeable = False
+    return data
+
+
+def load_csv(filepath: str) -> np.recarray:
+    """
+    Charge les resultats depuis un fichier CSV.
+
+    Les lignes sont comptees d'abord, puis copiees une a une dans un tableau
+    structure numpy prealloue (un seul buffer contigu, pas d'objet par
+    ligne). Les enregistrements exposent les memes attributs que
+    ResultEntry (r.algorithm, r.mean_time, ...).
+
+    Le resultat est mis en cache tant que le fichier n'est pas modifie ;
+    il est partage entre appelants et donc en lecture seule.
+
+    Args:
+        filepath: Chemin du fichier CSV
+
+    Returns:
+        Tableau d'enregistrements, un par ligne du CSV
+    """
+    filepath = os.path.abspath(filepath)
+    return _load_csv_cached(filepath, os.path.getmtime(filepath))
@@ -8,6 +8,7 @@ génère des statistiques de performance.
 Métriques mesurées :
 - Temps d'exécution (moyenne sur plusieurs runs)
 - Écart-type du temps
+- Médiane et écart absolu médian (MAD), robustes aux runs perturbés
 - Nombre de composantes connexes trouvées
 - Vérification de la cohérence des résultats
 
@@ -19,8 +20,12 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 
 import sys
 import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import List
+from statistics import fmean, median, pstdev
+from typing import List, Optional
 
 # Ajouter le répertoire parent au path pour les imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -32,7 +37,16 @@ from src.algorithms.two_pass import TwoPass
 from src.algorithms.union_find import UnionFind
 from src.algorithms.kruskal import Kruskal
 from src.algorithms.prim import Prim
-from src.utils.utils import Timer, mean, standard_deviation, min_array, max_array
+from src.utils.utils import min_array, max_array
+
+
+# Fonction de labellisation associee a chaque nom d'algorithme
+ALGORITHMS = {
+    "Two-Pass": TwoPass.label,
+    "Union-Find": UnionFind.label,
+    "Kruskal": Kruskal.label,
+    "Prim": Prim.label,
+}
 
 
 @dataclass
@@ -43,6 +57,8 @@ class AlgorithmResult:
     std_dev: float        # Écart-type (ms)
     min_time: float       # Temps minimum (ms)
     max_time: float       # Temps maximum (ms)
+    median_time: float    # Temps median (ms), robuste aux pics GC/ordonnanceur
+    mad: float            # Ecart absolu median (ms)
     num_components: int   # Nombre de composantes trouvées
 
 
@@ -50,12 +66,14 @@ class AlgorithmResult:
 class BenchmarkConfig:
     """Configuration du benchmark."""
     num_runs: int = 10            # Nombre de runs pour moyenner
+    warmup: int = 1               # Runs d'echauffement non chronometres
     connectivity: int = 4         # Connectivité à tester
     verify_results: bool = True   # Vérifier que tous les algos donnent le même résultat
 
 
 def benchmark_algorithm(algo_name: str, input_image: Image,
-                       connectivity: int, num_runs: int) -> AlgorithmResult:
+                       connectivity: int, num_runs: int,
+                       warmup: int = 1) -> AlgorithmResult:
     """
     Exécute le benchmark pour un algorithme donné.
 
@@ -64,41 +82,158 @@ def benchmark_algorithm(algo_name: str, input_image: Image,
         input_image: Image d'entrée
         connectivity: Connectivité (4 ou 8)
         num_runs: Nombre de runs
+        warmup: Nombre de runs d'echauffement non chronometres
 
     Returns:
         Résultat du benchmark
     """
     times = []
     labels = None
+    # Buffer de sortie alloue une fois, reutilise par tous les runs
+    out = LabelImage.empty_like(input_image)
+    # Fonction resolue une fois, hors de la boucle chronometree
+    label = ALGORITHMS[algo_name]
+    # perf_counter_ns lie une fois : resolution nanoseconde, pas d'objet Timer
+    perf_counter_ns = time.perf_counter_ns
+
+    # Les `warmup` premiers runs ne sont pas mesures : caches et
+    # allocateur sont "chauds" quand les mesures commencent
+    for run in range(warmup + num_runs):
+        start = perf_counter_ns()
 
-    for _ in range(num_runs):
-        timer = Timer()
-        timer.start()
+        labels = label(input_image, connectivity, out=out)
 
-        # Exécuter l'algorithme
-        if algo_name == "Two-Pass":
-            labels = TwoPass.label(input_image, connectivity)
-        elif algo_name == "Union-Find":
-            labels = UnionFind.label(input_image, connectivity)
-        elif algo_name == "Kruskal":
-            labels = Kruskal.label(input_image, connectivity)
-        elif algo_name == "Prim":
-            labels = Prim.label(input_image, connectivity)
+        if run >= warmup:
+            times.append((perf_counter_ns() - start) / 1e6)
 
-        elapsed = timer.stop()
-        times.append(elapsed)
+    num_components = labels.count_labels() if labels else 0
+
+    # Aucun run chronometre : statistiques a 0 (median leverait une erreur)
+    if not times:
+        return AlgorithmResult(name=algo_name, mean_time=0.0, std_dev=0.0,
+                               min_time=0.0, max_time=0.0, median_time=0.0,
+                               mad=0.0, num_components=num_components)
 
     # Calculer les statistiques
+    median_time = median(times)
     return AlgorithmResult(
         name=algo_name,
-        mean_time=mean(times),
-        std_dev=standard_deviation(times),
+        mean_time=fmean(times),
+        std_dev=pstdev(times),
         min_time=min_array(times),
         max_time=max_array(times),
-        num_components=labels.count_labels() if labels else 0
+        median_time=median_time,
+        mad=median(abs(t - median_time) for t in times),
+        num_components=num_components
     )
 
 
+# Image traitee par le processus de benchmark courant (voir _init_worker)
+_worker_image: Optional[Image] = None
+
+
+def _init_worker(image: Image, cpus=None, next_cpu=None) -> None:
+    """
+    Initialise un processus de benchmark.
+
+    L'image est transmise une seule fois au processus, puis partagee en
+    lecture seule par tous les runs qui s'y executent. Si `cpus` est
+    fourni, le processus est epingle sur un coeur qui lui est propre pour
+    eviter les migrations en cours de mesure (Linux uniquement).
+
+    Args:
+        image: Image binarisee a labelliser
+        cpus: Coeurs disponibles, au moins un par processus du pool
+        next_cpu: Compteur partage (multiprocessing.Value) des coeurs attribues
+    """
+    global _worker_image
+    _worker_image = image
+
+    if cpus is not None and next_cpu is not None:
+        with next_cpu.get_lock():
+            index = next_cpu.value
+            next_cpu.value += 1
+        # Jamais deux processus sur le meme coeur : au-dela, pas d'epinglage
+        if index < len(cpus):
+            os.sched_setaffinity(0, {cpus[index]})
+
+
+def _available_cpus() -> List[int]:
+    """Retourne les coeurs utilisables par ce processus (vide si inconnu)."""
+    if not hasattr(os, 'sched_getaffinity'):
+        return []
+    return sorted(os.sched_getaffinity(0))
+
+
+def _benchmark_in_worker(algo_name: str, connectivity: int, num_runs: int,
+                         warmup: int) -> AlgorithmResult:
+    """Exécute benchmark_algorithm sur l'image du processus courant."""
+    return benchmark_algorithm(algo_name, _worker_image, connectivity,
+                               num_runs, warmup)
+
+
+def _benchmark_parallel(image: Image, algorithms: List[str],
+                        config: BenchmarkConfig,
+                        cpus: List[int]) -> List[AlgorithmResult]:
+    """
+    Benchmarke les algorithmes en parallele, un coeur dedie par processus.
+
+    Le pool est limite au nombre de coeurs disponibles : deux mesures ne
+    partagent jamais un coeur, les algorithmes en trop attendent un
+    processus libre.
+    """
+    results_by_name = {}
+    next_cpu = multiprocessing.Value('i', 0)
+    num_workers = min(len(algorithms), len(cpus))
+
+    print(f"  Benchmark de {len(algorithms)} algorithmes sur {num_workers} coeurs...")
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=_init_worker,
+                             initargs=(image, cpus, next_cpu)) as executor:
+        futures = {
+            executor.submit(_benchmark_in_worker, algo_name,
+                            config.connectivity, config.num_runs,
+                            config.warmup): algo_name
+            for algo_name in algorithms
+        }
+
+        for future in as_completed(futures):
+            result = future.result()
+            results_by_name[futures[future]] = result
+            print(f"    {result.name} OK ({result.median_time:.2f} ms)")
+
+    # Conserver l'ordre de la liste pour l'affichage
+    return [results_by_name[name] for name in algorithms]
+
+
+def _benchmark_sequential(image: Image, algorithms: List[str],
+                          config: BenchmarkConfig) -> List[AlgorithmResult]:
+    """
+    Benchmarke les algorithmes l'un apres l'autre.
+
+    Utilise quand un coeur par processus n'est pas disponible : des
+    mesures simultanees se partageraient le meme coeur.
+    """
+    results = []
+
+    for algo_name in algorithms:
+        print(f"  Benchmark {algo_name}... ", end="", flush=True)
+
+        # Un processus dedie par algorithme : GC et allocateur isoles,
+        # les mesures d'un algorithme ne subissent pas le tas du precedent
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                 initargs=(image,)) as executor:
+            result = executor.submit(
+                _benchmark_in_worker, algo_name, config.connectivity,
+                config.num_runs, config.warmup).result()
+
+        results.append(result)
+
+        print(f"OK ({result.mean_time:.2f} ms)")
+
+    return results
+
+
 def print_results(results: List[AlgorithmResult], image_name: str,
                  image_size: int, connectivity: int) -> None:
     """
@@ -117,20 +252,23 @@ def print_results(results: List[AlgorithmResult], image_name: str,
     print("========================================\n")
 
     # Header du tableau
-    print(f"{'Algorithme':>15} {'Moyenne':>12} {'Ecart-type':>12} {'Min':>12} {'Max':>12} {'Composantes':>15}")
-    print("-" * 78)
+    print(f"{'Algorithme':>15} {'Moyenne':>12} {'Ecart-type':>12} {'Mediane':>12} {'MAD':>12} "
+          f"{'Min':>12} {'Max':>12} {'Composantes':>15}")
+    print("-" * 104)
 
     # Résultats pour chaque algorithme
     for result in results:
         print(f"{result.name:>15} {result.mean_time:>12.2f} {result.std_dev:>12.2f} "
+              f"{result.median_time:>12.2f} {result.mad:>12.2f} "
               f"{result.min_time:>12.2f} {result.max_time:>12.2f} {result.num_components:>15}")
 
     print()
 
-    # Trouver l'algorithme le plus rapide
+    # Trouver l'algorithme le plus rapide : le temps minimum estime la
+    # vitesse reelle, un run ralenti par le systeme ne change pas le gagnant
     fastest_idx = 0
     for i in range(1, len(results)):
-        if results[i].mean_time < results[fastest_idx].mean_time:
+        if results[i].min_time < results[fastest_idx].min_time:
             fastest_idx = i
 
     print(f"Algorithme le plus rapide: {results[fastest_idx].name}")
@@ -138,7 +276,7 @@ def print_results(results: List[AlgorithmResult], image_name: str,
     # Speedup relatif par rapport au plus rapide
     print(f"\nSpeedup relatif (par rapport a {results[fastest_idx].name}):")
     for result in results:
-        speedup = result.mean_time / results[fastest_idx].mean_time
+        speedup = result.min_time / results[fastest_idx].min_time
         print(f"  {result.name:>15}: {speedup:.2f}x")
 
     # Vérification de cohérence
@@ -168,10 +306,11 @@ def main():
 
     print("Configuration:")
     print(f"  Nombre de runs par algorithme: {config.num_runs}")
+    print(f"  Runs d'echauffement: {config.warmup}")
     print(f"  Connectivite: {config.connectivity}\n")
 
     # Liste des algorithmes à tester
-    algorithms = ["Two-Pass", "Union-Find", "Kruskal", "Prim"]
+    algorithms = list(ALGORITHMS)
 
     # Pour chaque image fournie en argument
     for img_idx in range(1, len(sys.argv)):
@@ -188,18 +327,12 @@ def main():
         # Binariser l'image
         input_image.binarize(128)
 
-        # Benchmarker tous les algorithmes
-        results = []
-
-        for algo_name in algorithms:
-            print(f"  Benchmark {algo_name}... ", end="", flush=True)
-
-            result = benchmark_algorithm(
-                algo_name, input_image, config.connectivity, config.num_runs)
-
-            results.append(result)
+        cpus = _available_cpus()
 
-            print(f"OK ({result.mean_time:.2f} ms)")
+        if len(cpus) >= 2:
+            results = _benchmark_parallel(input_image, algorithms, config, cpus)
+        else:
+            results = _benchmark_sequential(input_image, algorithms, config)
 
         # Afficher les résultats
         print_results(results, image_file, input_image.size, config.connectivity)
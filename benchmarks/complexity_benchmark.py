@@ -16,7 +16,11 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 import sys
 import os
 import csv
-from typing import List, Dict, Tuple
+import math
+import time
+from functools import lru_cache
+from statistics import fmean, stdev
+from typing import List, Dict, Optional, Tuple
 
 # Ajouter le répertoire parent au path pour les imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -26,7 +30,13 @@ from src.algorithms.two_pass import TwoPass
 from src.algorithms.union_find import UnionFind
 from src.algorithms.kruskal import Kruskal
 from src.algorithms.prim import Prim
-from src.utils.utils import Timer
+
+# numpy sert uniquement a generer rapidement les images de test
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 # Essayer d'importer matplotlib pour les graphiques
 try:
@@ -36,34 +46,21 @@ except ImportError:
     MATPLOTLIB_AVAILABLE = False
 
 
-# ============================================================================
-# Fonctions statistiques manuelles
-# ============================================================================
-
-def manual_mean(values: List[float]) -> float:
-    """Calcule la moyenne manuellement."""
-    if not values:
-        return 0.0
-    return sum(values) / len(values)
-
-
-def manual_std(values: List[float]) -> float:
-    """Calcule l'ecart-type manuellement."""
-    if len(values) < 2:
-        return 0.0
-    m = manual_mean(values)
-    variance = sum((v - m) ** 2 for v in values) / (len(values) - 1)
-    return variance ** 0.5
-
-
 # ============================================================================
 # Génération d'images de test
 # ============================================================================
 
+# Periode du motif pseudo-aleatoire en x et en y (217 et 403 premiers avec 100)
+PATTERN_PERIOD = 100
+
+@lru_cache(maxsize=None)
 def create_test_image(size: int, density: float = 0.3) -> Image:
     """
     Crée une image de test avec des objets pseudo-aléatoires.
 
+    L'image est mise en cache par (size, density) : les algorithmes ne
+    modifient pas leur image d'entree, elle est donc partagee entre les runs.
+
     Args:
         size: Dimension de l'image (size x size)
         density: Densité d'objets (proportion de pixels blancs)
@@ -73,15 +70,28 @@ def create_test_image(size: int, density: float = 0.3) -> Image:
     """
     image = Image(size, size)
 
-    # Génération pseudo-aléatoire déterministe basée sur la position
-    for x in range(size):
-        for y in range(size):
-            # Utilise une formule pseudo-aléatoire simple
-            val = ((x * 7 + y * 13) * 31) % 100
-            if val < density * 100:
-                image.set_at(x, y, 255)
-            else:
-                image.set_at(x, y, 0)
+    # ((x * 7 + y * 13) * 31) % 100 = (x * 217 + y * 403) % 100 est
+    # periodique de periode PATTERN_PERIOD en x comme en y : on calcule un
+    # seul motif (au plus 100x100, tient en cache L1) puis on le repete
+    period = min(size, PATTERN_PERIOD)
+    threshold = density * 100
+
+    if NUMPY_AVAILABLE:
+        xs = np.arange(period)[:, None]
+        ys = np.arange(period)[None, :]
+        tile = np.where((xs * 217 + ys * 403) % 100 < threshold, 255, 0).astype(np.uint8)
+        reps = -(-size // period)
+        image.data = np.tile(tile, (reps, reps))[:size, :size].tolist()
+        return image
+
+    # Version pure Python : le motif d'une ligne est calcule une fois par
+    # ligne du motif, puis recopie pour les lignes suivantes de la periode
+    columns = [y * 403 for y in range(size)]
+    pattern_rows = [
+        [255 if (x * 217 + col) % 100 < threshold else 0 for col in columns]
+        for x in range(period)
+    ]
+    image.data = [pattern_rows[x % period][:] for x in range(size)]
 
     return image
 
@@ -119,24 +129,24 @@ def benchmark_single(image: Image, algorithm_name: str, connectivity: int) -> fl
     Returns:
         Temps en millisecondes
     """
-    test_image = image.copy()
-    algorithm_class = ALGORITHMS[algorithm_name]
+    # Methode resolue avant le debut de la mesure
+    label = ALGORITHMS[algorithm_name].label
 
-    timer = Timer()
-    timer.start()
-    algorithm_class.label(test_image, connectivity)
-    elapsed = timer.stop()
+    # Pas de copie : les algorithmes ne modifient pas l'image d'entree
+    start = time.perf_counter_ns()
+    label(image, connectivity)
+    return (time.perf_counter_ns() - start) / 1e6
 
-    return elapsed
 
-
-def run_complexity_benchmark(sizes: List[int], num_runs: int = 5) -> Dict:
+def run_complexity_benchmark(sizes: List[int], num_runs: int = 5,
+                             warmup: int = 1) -> Dict:
     """
     Execute le benchmark de complexité.
 
     Args:
         sizes: Liste des tailles d'images à tester
         num_runs: Nombre de runs par configuration
+        warmup: Nombre de runs d'echauffement non chronometres
 
     Returns:
         Dictionnaire des résultats
@@ -149,6 +159,7 @@ def run_complexity_benchmark(sizes: List[int], num_runs: int = 5) -> Dict:
     print(f"\nConfiguration:")
     print(f"  - Tailles: {sizes}")
     print(f"  - Runs par config: {num_runs}")
+    print(f"  - Runs d'echauffement: {warmup}")
     print(f"  - Connectivite: 4")
     print()
 
@@ -165,13 +176,17 @@ def run_complexity_benchmark(sizes: List[int], num_runs: int = 5) -> Dict:
 
             print(f"    {algo_name:12s}: ", end="", flush=True)
 
+            # Runs d'echauffement : temps ignores
+            for _ in range(warmup):
+                benchmark_single(image, algo_name, 4)
+
             for _ in range(num_runs):
                 elapsed = benchmark_single(image, algo_name, 4)
                 times.append(elapsed)
                 print(".", end="", flush=True)
 
-            mean_time = manual_mean(times)
-            std_time = manual_std(times)
+            mean_time = fmean(times) if times else 0.0
+            std_time = stdev(times) if len(times) > 1 else 0.0
 
             results[algo_name].append({
                 'size': size,
@@ -185,29 +200,103 @@ def run_complexity_benchmark(sizes: List[int], num_runs: int = 5) -> Dict:
     return results
 
 
-def export_csv(results: Dict, output_path: str):
-    """Exporte les résultats en CSV."""
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+def fit_complexity(results: Dict) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Estime la complexité empirique par régression linéaire en log-log.
+
+    Ajuste log(t) = k * log(N) + b pour chaque algorithme : k est
+    l'exposant empirique (t ~ N^k), R² la qualité de l'ajustement.
+
+    Args:
+        results: Résultats de run_complexity_benchmark
+
+    Returns:
+        Dictionnaire algo -> (k, b, R²), vide pour un algorithme mesuré
+        sur moins de deux tailles ou sans temps mesuré (--runs 0)
+    """
+    fits = {}
+    for algo, data in results.items():
+        # log(0) indéfini : pas d'ajustement sans temps mesurés
+        if any(d['mean_time'] <= 0 for d in data):
+            continue
+        log_pixels = [math.log(d['pixels']) for d in data]
+        log_times = [math.log(d['mean_time']) for d in data]
+        # Au moins deux tailles distinctes pour ajuster une droite
+        if len(set(log_pixels)) < 2:
+            continue
+        fits[algo] = _least_squares(log_pixels, log_times)
+    return fits
+
+
+def _least_squares(xs: List[float], ys: List[float]) -> Tuple[float, float, float]:
+    """
+    Régression linéaire y = k * x + b par moindres carrés.
 
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+    Calculée à la main (statistics.linear_regression et correlation
+    n'existent qu'à partir de Python 3.10).
+
+    Args:
+        xs: Abscisses (au moins deux valeurs distinctes)
+        ys: Ordonnées
+
+    Returns:
+        (k, b, R²) ; R² vaut 1 si toutes les ordonnées sont égales
+    """
+    mean_x = fmean(xs)
+    mean_y = fmean(ys)
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    r_squared = sxy * sxy / (sxx * syy) if syy > 0 else 1.0
+    return slope, intercept, r_squared
+
+
+def print_complexity(fits: Dict[str, Tuple[float, float, float]]):
+    """Affiche l'exposant empirique de chaque algorithme."""
+    print("\nComplexite empirique (regression log-log):")
+    for algo, (slope, _, r_squared) in fits.items():
+        print(f"    {algo:12s}: t ~ N^{slope:.2f} (R2 = {r_squared:.3f})")
+
+
+def export_csv(results: Dict, output_path: str,
+               fits: Optional[Dict[str, Tuple[float, float, float]]] = None):
+    """Exporte les résultats en CSV (avec la pente/ordonnée de la régression)."""
+    fits = fits or {}
+    no_fit = ('', '')
+    fit_columns = {
+        algo: (f"{fit[0]:.4f}", f"{fit[1]:.4f}") for algo, fit in fits.items()
+    }
+
+    # Lignes construites en memoire puis ecrites en un seul writerows
+    rows = [
+        [algo, entry['size'], entry['pixels'],
+         f"{entry['mean_time']:.4f}", f"{entry['std_time']:.4f}",
+         *fit_columns.get(algo, no_fit)]
+        for algo, data in results.items()
+        for entry in data
+    ]
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    with open(output_path, 'w', newline='', encoding='utf-8',
+              buffering=1 << 20) as f:
         writer = csv.writer(f)
-        writer.writerow(['algorithm', 'size', 'pixels', 'mean_time_ms', 'std_time_ms'])
-
-        for algo, data in results.items():
-            for entry in data:
-                writer.writerow([
-                    algo,
-                    entry['size'],
-                    entry['pixels'],
-                    f"{entry['mean_time']:.4f}",
-                    f"{entry['std_time']:.4f}"
-                ])
+        writer.writerow(['algorithm', 'size', 'pixels', 'mean_time_ms', 'std_time_ms',
+                         'slope', 'intercept'])
+        writer.writerows(rows)
 
     print(f"\nResultats exportes: {output_path}")
 
 
-def generate_complexity_graph(results: Dict, output_dir: str):
-    """Génère le graphique de complexité."""
+def generate_complexity_graph(results: Dict, output_dir: str,
+                              fits: Optional[Dict[str, Tuple[float, float, float]]] = None):
+    """Génère le graphique de complexité (avec les droites de régression)."""
+    fits = fits or {}
     if not MATPLOTLIB_AVAILABLE:
         print("matplotlib non disponible - graphique non genere")
         return
@@ -227,6 +316,13 @@ def generate_complexity_graph(results: Dict, output_dir: str):
         ax1.errorbar(pixels, times, yerr=stds, label=label,
                      color=color, marker='o', capsize=3, linewidth=2)
 
+        # Droite de régression t = e^b * N^k (droite en log-log)
+        if algo in fits:
+            slope, intercept, _ = fits[algo]
+            ax1.plot(pixels, [math.exp(intercept) * n ** slope for n in pixels],
+                     '--', color=color, linewidth=1,
+                     label=f'{label} ~ N^{slope:.2f}')
+
     ax1.set_xlabel('Nombre de pixels (N)', fontsize=12)
     ax1.set_ylabel('Temps (ms)', fontsize=12)
     ax1.set_title('Complexite empirique: Temps = f(N)', fontsize=14)
@@ -299,27 +395,34 @@ def main():
     )
     parser.add_argument('--runs', type=int, default=5,
                         help='Nombre de runs par configuration (defaut: 5)')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='Runs d\'echauffement non chronometres (defaut: 1)')
     parser.add_argument('--sizes', type=str, default='64,128,256,512',
                         help='Tailles a tester, separees par des virgules')
 
     args = parser.parse_args()
 
     # Parser les tailles
-    sizes = [int(s.strip()) for s in args.sizes.split(',')]
+    # Tailles sans doublon (ordre conserve)
+    sizes = list(dict.fromkeys(int(s.strip()) for s in args.sizes.split(',')))
 
     # Changer vers le repertoire du projet
     project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     os.chdir(project_dir)
 
     # Executer le benchmark
-    results = run_complexity_benchmark(sizes, args.runs)
+    results = run_complexity_benchmark(sizes, args.runs, args.warmup)
+
+    # Estimer la complexite empirique
+    fits = fit_complexity(results)
+    print_complexity(fits)
 
     # Exporter les resultats
     csv_path = 'benchmarks/results/complexity_results.csv'
-    export_csv(results, csv_path)
+    export_csv(results, csv_path, fits)
 
     # Generer les graphiques
-    generate_complexity_graph(results, 'benchmarks/results/graphs')
+    generate_complexity_graph(results, 'benchmarks/results/graphs', fits)
 
     print("\n" + "=" * 60)
     print("  BENCHMARK TERMINE")
@@ -19,133 +19,268 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 
 import sys
 import os
-import csv
-from dataclasses import dataclass
-from typing import List, Dict
-
-# Importer matplotlib
-try:
-    import matplotlib.pyplot as plt
-    import matplotlib.patches as mpatches
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
+import hashlib
+import importlib.util
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
+
+# Backend sans interface graphique : rendu direct en PNG, y compris dans
+# les processus de rendu parallele (aucune detection de backend)
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+# matplotlib n'est importe qu'au premier graphique (voir _figure_class) :
+# ici on verifie seulement sa presence
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec('matplotlib') is not None
+if MATPLOTLIB_AVAILABLE:
+    import numpy as np  # dependance de matplotlib, toujours presente avec lui
+    # Chargeur commun avec generate_report_pdf.py (cache par fichier)
+    from _csv_cache import load_csv
+else:
     print("ERREUR: matplotlib n'est pas installe.")
     print("Installez-le avec: pip install matplotlib")
 
 
 # ============================================================================
-# Structure de donnees
+# Fonctions utilitaires
 # ============================================================================
 
-@dataclass
-class ResultEntry:
-    """Une entree de resultat."""
-    image: str
-    algorithm: str
-    connectivity: int
-    runs: int
-    mean_time: float
-    std_time: float
-    min_time: float
-    max_time: float
-    num_components: int
+def group_by(keys: "np.ndarray"):
+    """
+    Indexe les groupes d'une colonne (ex: algorithm).
 
+    Args:
+        keys: Colonne de regroupement
 
-# ============================================================================
-# Fonctions utilitaires
-# ============================================================================
+    Returns:
+        (groupes dans l'ordre de premiere apparition, indice de groupe de
+        chaque ligne)
+    """
+    uniques, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return uniques[order].tolist(), rank[inverse]
 
-def manual_mean(values: List[float]) -> float:
-    """Calcule la moyenne."""
-    if not values:
-        return 0.0
-    return sum(values) / len(values)
+
+def group_mean(group_index: "np.ndarray", values: "np.ndarray", num_groups: int,
+               mask: "np.ndarray" = None) -> "np.ndarray":
+    """
+    Moyenne de `values` par groupe, en une passe (np.bincount).
+
+    Args:
+        group_index: Indice de groupe de chaque ligne (voir group_by)
+        values: Valeurs a moyenner
+        num_groups: Nombre de groupes
+        mask: Lignes a prendre en compte (toutes par defaut)
+
+    Returns:
+        Moyenne de chaque groupe (0 pour un groupe vide)
+    """
+    if mask is not None:
+        group_index = group_index[mask]
+        values = values[mask]
+    counts = np.bincount(group_index, minlength=num_groups)
+    sums = np.bincount(group_index, weights=values, minlength=num_groups)
+    return np.divide(sums, counts, out=np.zeros(num_groups), where=counts > 0)
 
 
-def load_csv(filepath: str) -> List[ResultEntry]:
+def pivot_by_image(results: "np.recarray", column: str, images: "np.ndarray",
+                   algorithms: List[str], connectivity: int = 4) -> "np.ndarray":
     """
-    Charge les resultats depuis un fichier CSV.
+    Tableau croise images x algorithmes d'une colonne, en une passe.
 
     Args:
-        filepath: Chemin du fichier CSV
+        results: Resultats
+        column: Colonne a reporter (ex: 'mean_time')
+        images: Noms d'images tries (np.unique)
+        algorithms: Algorithmes, dans l'ordre des colonnes du tableau
+        connectivity: Connectivite retenue
 
     Returns:
-        Liste des entrees
+        Tableau (nb images, nb algorithmes), 0 pour une combinaison absente
     """
-    results = []
+    algorithms = np.asarray(algorithms)
+    table = np.zeros((len(images), len(algorithms)))
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    rows = results[(results.connectivity == connectivity)
+                   & np.isin(results.algorithm, algorithms)]
 
-        for row in reader:
-            entry = ResultEntry(
-                image=row['image'],
-                algorithm=row['algorithm'],
-                connectivity=int(row['connectivity']),
-                runs=int(row['runs']),
-                mean_time=float(row['mean_time_ms']),
-                std_time=float(row['std_time_ms']),
-                min_time=float(row['min_time_ms']),
-                max_time=float(row['max_time_ms']),
-                num_components=int(row['num_components'])
-            )
-            results.append(entry)
+    sorter = np.argsort(algorithms)
+    image_idx = np.searchsorted(images, rows.image)
+    algo_idx = sorter[np.searchsorted(algorithms, rows.algorithm, sorter=sorter)]
 
-    return results
+    # En cas de doublon, la premiere ligne du CSV l'emporte : np.unique
+    # renvoie la position de la premiere occurrence de chaque case
+    cells, first = np.unique(image_idx * len(algorithms) + algo_idx,
+                             return_index=True)
+    table.flat[cells] = rows[column][first]
+    return table
+
+
+def shorten_labels(names: "np.ndarray", max_length: int = 15) -> List[str]:
+    """
+    Tronque des noms trop longs pour l'affichage ('nom_tres_long...').
+
+    Args:
+        names: Tableau de chaines (dtype U)
+        max_length: Longueur maximale conservee
+
+    Returns:
+        Noms, tronques et suffixes de '...' au-dela de max_length
+    """
+    # La conversion vers U{max_length} tronque toutes les chaines en une fois
+    truncated = np.char.add(names.astype(f'U{max_length}'), '...')
+    return np.where(np.char.str_len(names) > max_length, truncated, names).tolist()
+
+
+def compute_aggregates(results: "np.recarray") -> Dict:
+    """
+    Calcule en une fois toutes les donnees agregees utilisees par les graphiques.
+
+    Args:
+        results: Resultats charges par load_csv
+
+    Returns:
+        Dictionnaire des agregats :
+        - 'algorithms' : algorithmes (ordre de premiere apparition)
+        - 'mean_time', 'std_time' : moyennes par algorithme
+        - 'mean_time_conn' : {connectivite: moyenne par algorithme}
+        - 'images' : noms d'images tries
+        - 'image_labels' : noms d'images tronques pour l'axe des abscisses
+        - 'image_algorithms' : algorithmes tries (colonnes de 'mean_pivot')
+        - 'mean_pivot' : temps par image x algorithme (connectivite 4)
+        - 'components_pivot' : composantes par image x COMPONENTS_ALGORITHMS
+          (connectivite 4)
+    """
+    algorithms, algo_index = group_by(results.algorithm)
+    num_algorithms = len(algorithms)
+    # Une seule passe np.unique par colonne : la liste triee des algorithmes
+    # se deduit des groupes deja calcules
+    images = np.unique(results.image)
+    image_algorithms = sorted(algorithms)
+
+    return {
+        'algorithms': algorithms,
+        'mean_time': group_mean(algo_index, results.mean_time, num_algorithms),
+        'std_time': group_mean(algo_index, results.std_time, num_algorithms),
+        'mean_time_conn': {
+            conn: group_mean(algo_index, results.mean_time, num_algorithms,
+                             results.connectivity == conn)
+            for conn in (4, 8)
+        },
+        'images': images,
+        'image_labels': shorten_labels(images),
+        'image_algorithms': image_algorithms,
+        'mean_pivot': pivot_by_image(results, 'mean_time', images, image_algorithms),
+        'components_pivot': pivot_by_image(results, 'num_components', images,
+                                           COMPONENTS_ALGORITHMS),
+    }
 
 
 # ============================================================================
 # Generation des graphiques
 # ============================================================================
 
+# Options d'enregistrement des PNG : 120 dpi suffisent pour l'ecran et le
+# rapport PDF, compression zlib rapide (niveau 3 au lieu de 6), pas de
+# bloc texte "Software" dans le fichier
+SAVE_KW = dict(dpi=120, pil_kwargs={'compress_level': 3},
+               metadata={'Software': None})
+
+# Reglages de rendu appliques a l'import de matplotlib : pas de hinting
+# des polices (appels FreeType), chemins simplifies et decoupes
+RC_PARAMS = {
+    'text.hinting': 'none',
+    'agg.path.chunksize': 10000,
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+}
+
+# Classe Figure de matplotlib, importee au premier graphique
+_Figure = None
+
+# Figure du processus courant, reutilisee d'un graphique a l'autre
+_figure = None
+
+
+def _figure_class():
+    """Importe matplotlib a la demande et retourne sa classe Figure."""
+    global _Figure
+    if _Figure is None:
+        import matplotlib
+        from matplotlib.figure import Figure
+        matplotlib.rcParams.update(RC_PARAMS)
+        _Figure = Figure
+    return _Figure
+
+
+def _new_axes(figsize):
+    """
+    Prepare la figure du processus pour un nouveau graphique.
+
+    La figure (canvas Agg, polices, ...) n'est construite qu'une fois par
+    processus ; elle est videe et redimensionnee a chaque graphique.
+
+    Args:
+        figsize: Taille de la figure en pouces (largeur, hauteur)
+
+    Returns:
+        (figure, axes) vierges
+    """
+    global _figure
+    if _figure is None:
+        _figure = _figure_class()(figsize=figsize)
+    else:
+        _figure.clear()
+        _figure.set_size_inches(figsize)
+    return _figure, _figure.add_subplot()
+
+
 # Couleurs pour les algorithmes
 ALGO_COLORS = {
     'two_pass': '#3498db',      # Bleu
     'union_find': '#2ecc71',    # Vert
     'kruskal': '#e74c3c',       # Rouge
-    'prim': '#9b59b6'           # Violet
+    'prim': '#9b59b6',          # Violet
+    'opencv': '#7f8c8d'         # Gris (reference, --reference)
 }
 
 ALGO_LABELS = {
     'two_pass': 'Two-Pass',
     'union_find': 'Union-Find',
     'kruskal': 'Kruskal',
-    'prim': 'Prim'
+    'prim': 'Prim',
+    'opencv': 'OpenCV (ref.)'
 }
 
+# Algorithmes (et ordre des barres) du graphique de coherence
+COMPONENTS_ALGORITHMS = ['two_pass', 'union_find', 'kruskal', 'prim']
 
-def graph_algorithm_comparison(results: List[ResultEntry], output_dir: str):
+
+def graph_algorithm_comparison(agg: Dict, output_dir: Path) -> Optional[Path]:
     """
     Graphique 1: Comparaison globale des algorithmes.
 
     Args:
-        results: Liste des resultats
+        agg: Agregats des resultats (voir compute_aggregates)
         output_dir: Repertoire de sortie
+
+    Returns:
+        Chemin du fichier PNG genere
     """
     if not MATPLOTLIB_AVAILABLE:
-        return
+        return None
 
-    # Grouper par algorithme
-    algo_times: Dict[str, List[float]] = {}
-    algo_stds: Dict[str, List[float]] = {}
-
-    for r in results:
-        if r.algorithm not in algo_times:
-            algo_times[r.algorithm] = []
-            algo_stds[r.algorithm] = []
-        algo_times[r.algorithm].append(r.mean_time)
-        algo_stds[r.algorithm].append(r.std_time)
-
-    # Calculer les moyennes
-    algorithms = list(algo_times.keys())
-    means = [manual_mean(algo_times[a]) for a in algorithms]
-    stds = [manual_mean(algo_stds[a]) for a in algorithms]
+    # Moyennes par algorithme
+    algorithms = agg['algorithms']
+    means = agg['mean_time']
+    stds = agg['std_time']
     colors = [ALGO_COLORS.get(a, '#95a5a6') for a in algorithms]
     labels = [ALGO_LABELS.get(a, a) for a in algorithms]
 
     # Creer le graphique
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = _new_axes((10, 6))
 
     bars = ax.bar(labels, means, yerr=stds, capsize=5, color=colors, edgecolor='black')
 
@@ -154,109 +289,98 @@ def graph_algorithm_comparison(results: List[ResultEntry], output_dir: str):
     ax.set_title('Comparaison des algorithmes de labellisation\n(Moyenne sur toutes les images et connectivites)', fontsize=14)
 
     # Ajouter les valeurs sur les barres
-    for bar, mean, std in zip(bars, means, stds):
-        height = bar.get_height()
-        ax.annotate(f'{mean:.1f}ms',
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3),
-                    textcoords="offset points",
-                    ha='center', va='bottom', fontsize=10)
+    ax.bar_label(bars, labels=[f'{mean:.1f}ms' for mean in means],
+                 padding=3, fontsize=10)
 
     ax.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.tight_layout()
+    fig.tight_layout()
 
-    output_path = os.path.join(output_dir, 'comparison_algorithms.png')
-    plt.savefig(output_path, dpi=150)
-    plt.close()
-    print(f"  Graphique cree: {output_path}")
+    output_path = output_dir / 'comparison_algorithms.png'
+    fig.savefig(output_path, **SAVE_KW)
+    return output_path
 
 
-def graph_image_comparison(results: List[ResultEntry], output_dir: str):
+def graph_image_comparison(agg: Dict, output_dir: Path) -> Optional[Path]:
     """
     Graphique 2: Comparaison par image (grouped bars).
 
     Args:
-        results: Liste des resultats
+        agg: Agregats des resultats (voir compute_aggregates)
         output_dir: Repertoire de sortie
+
+    Returns:
+        Chemin du fichier PNG genere
     """
     if not MATPLOTLIB_AVAILABLE:
-        return
+        return None
 
-    # Grouper par image et algorithme (connectivite 4 seulement pour simplifier)
-    images = sorted(set(r.image for r in results))
-    algorithms = sorted(set(r.algorithm for r in results))
-
-    # Filtrer pour connectivite 4
-    data: Dict[str, Dict[str, float]] = {img: {} for img in images}
-
-    for r in results:
-        if r.connectivity == 4:
-            data[r.image][r.algorithm] = r.mean_time
+    # Tableau image x algorithme (connectivite 4 seulement pour simplifier)
+    images = agg['images']
+    algorithms = agg['image_algorithms']
+    table = agg['mean_pivot']
 
     # Creer le graphique
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = _new_axes((12, 6))
 
-    x = range(len(images))
-    width = 0.2
-    offsets = [-1.5, -0.5, 0.5, 1.5]
+    # Barres centrees sur chaque image, largeur totale 0.8 quel que soit le
+    # nombre d'algorithmes (4 : largeur 0.2, decalages -1.5 .. 1.5)
+    x = np.arange(len(images))
+    width = 0.8 / max(len(algorithms), 1)
+    offsets = np.arange(len(algorithms)) - (len(algorithms) - 1) / 2
 
-    for i, algo in enumerate(algorithms):
-        values = [data[img].get(algo, 0) for img in images]
-        color = ALGO_COLORS.get(algo, '#95a5a6')
-        label = ALGO_LABELS.get(algo, algo)
-        ax.bar([xi + offsets[i] * width for xi in x], values, width,
+    # Couleurs et libelles resolus une fois, hors de la boucle de trace
+    colors = [ALGO_COLORS.get(a, '#95a5a6') for a in algorithms]
+    labels = [ALGO_LABELS.get(a, a) for a in algorithms]
+
+    for i, (color, label) in enumerate(zip(colors, labels)):
+        values = table[:, i]
+        ax.bar(x + offsets[i] * width, values, width,
                label=label, color=color, edgecolor='black')
 
     ax.set_xlabel('Image', fontsize=12)
     ax.set_ylabel('Temps (ms)', fontsize=12)
     ax.set_title('Temps d\'execution par image et algorithme\n(Connectivite 4)', fontsize=14)
     ax.set_xticks(x)
-    ax.set_xticklabels([img[:15] + '...' if len(img) > 15 else img for img in images], rotation=45, ha='right')
+    ax.set_xticklabels(agg['image_labels'], rotation=45, ha='right')
     ax.legend()
     ax.grid(axis='y', linestyle='--', alpha=0.7)
 
-    plt.tight_layout()
+    fig.tight_layout()
 
-    output_path = os.path.join(output_dir, 'comparison_images.png')
-    plt.savefig(output_path, dpi=150)
-    plt.close()
-    print(f"  Graphique cree: {output_path}")
+    output_path = output_dir / 'comparison_images.png'
+    fig.savefig(output_path, **SAVE_KW)
+    return output_path
 
 
-def graph_connectivity_comparison(results: List[ResultEntry], output_dir: str):
+def graph_connectivity_comparison(agg: Dict, output_dir: Path) -> Optional[Path]:
     """
     Graphique 3: Impact de la connectivite (4 vs 8).
 
     Args:
-        results: Liste des resultats
+        agg: Agregats des resultats (voir compute_aggregates)
         output_dir: Repertoire de sortie
+
+    Returns:
+        Chemin du fichier PNG genere
     """
     if not MATPLOTLIB_AVAILABLE:
-        return
-
-    # Grouper par algorithme et connectivite
-    data: Dict[str, Dict[int, List[float]]] = {}
-
-    for r in results:
-        if r.algorithm not in data:
-            data[r.algorithm] = {4: [], 8: []}
-        data[r.algorithm][r.connectivity].append(r.mean_time)
+        return None
 
-    # Calculer les moyennes
-    algorithms = list(data.keys())
-    times_4 = [manual_mean(data[a][4]) for a in algorithms]
-    times_8 = [manual_mean(data[a][8]) for a in algorithms]
+    # Moyennes par algorithme et connectivite
+    algorithms = agg['algorithms']
+    times_4 = agg['mean_time_conn'][4]
+    times_8 = agg['mean_time_conn'][8]
     labels = [ALGO_LABELS.get(a, a) for a in algorithms]
 
     # Creer le graphique
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = _new_axes((10, 6))
 
-    x = range(len(algorithms))
+    x = np.arange(len(algorithms))
     width = 0.35
 
-    bars1 = ax.bar([xi - width/2 for xi in x], times_4, width, label='Connectivite 4',
+    bars1 = ax.bar(x - width / 2, times_4, width, label='Connectivite 4',
                    color='#3498db', edgecolor='black')
-    bars2 = ax.bar([xi + width/2 for xi in x], times_8, width, label='Connectivite 8',
+    bars2 = ax.bar(x + width / 2, times_8, width, label='Connectivite 8',
                    color='#e74c3c', edgecolor='black')
 
     ax.set_xlabel('Algorithme', fontsize=12)
@@ -267,47 +391,43 @@ def graph_connectivity_comparison(results: List[ResultEntry], output_dir: str):
     ax.legend()
     ax.grid(axis='y', linestyle='--', alpha=0.7)
 
-    plt.tight_layout()
+    fig.tight_layout()
 
-    output_path = os.path.join(output_dir, 'connectivity_comparison.png')
-    plt.savefig(output_path, dpi=150)
-    plt.close()
-    print(f"  Graphique cree: {output_path}")
+    output_path = output_dir / 'connectivity_comparison.png'
+    fig.savefig(output_path, **SAVE_KW)
+    return output_path
 
 
-def graph_speedup(results: List[ResultEntry], output_dir: str):
+def graph_speedup(agg: Dict, output_dir: Path) -> Optional[Path]:
     """
     Graphique 4: Speedup relatif (reference = two_pass).
 
     Args:
-        results: Liste des resultats
+        agg: Agregats des resultats (voir compute_aggregates)
         output_dir: Repertoire de sortie
+
+    Returns:
+        Chemin du fichier PNG genere
     """
     if not MATPLOTLIB_AVAILABLE:
-        return
-
-    # Calculer le temps moyen par algorithme
-    algo_times: Dict[str, List[float]] = {}
+        return None
 
-    for r in results:
-        if r.algorithm not in algo_times:
-            algo_times[r.algorithm] = []
-        algo_times[r.algorithm].append(r.mean_time)
-
-    algorithms = list(algo_times.keys())
-    means = {a: manual_mean(algo_times[a]) for a in algorithms}
+    # Temps moyen par algorithme
+    algorithms = agg['algorithms']
+    means = agg['mean_time']
 
     # Utiliser two_pass comme reference
-    reference = means.get('two_pass', 1.0)
+    reference = means[algorithms.index('two_pass')] if 'two_pass' in algorithms else 1.0
     if reference == 0:
         reference = 1.0
 
-    speedups = [reference / means[a] if means[a] > 0 else 0 for a in algorithms]
+    # Division vectorisee, speedup 0 pour un temps moyen nul
+    speedups = np.divide(reference, means, out=np.zeros_like(means), where=means > 0)
     colors = [ALGO_COLORS.get(a, '#95a5a6') for a in algorithms]
     labels = [ALGO_LABELS.get(a, a) for a in algorithms]
 
     # Creer le graphique
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = _new_axes((10, 6))
 
     bars = ax.bar(labels, speedups, color=colors, edgecolor='black')
 
@@ -319,91 +439,189 @@ def graph_speedup(results: List[ResultEntry], output_dir: str):
     ax.set_title('Speedup relatif par rapport a Two-Pass\n(>1 = plus rapide)', fontsize=14)
 
     # Ajouter les valeurs sur les barres
-    for bar, speedup in zip(bars, speedups):
-        height = bar.get_height()
-        ax.annotate(f'{speedup:.2f}x',
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3),
-                    textcoords="offset points",
-                    ha='center', va='bottom', fontsize=10, fontweight='bold')
+    ax.bar_label(bars, labels=[f'{speedup:.2f}x' for speedup in speedups],
+                 padding=3, fontsize=10, fontweight='bold')
 
     ax.legend()
     ax.grid(axis='y', linestyle='--', alpha=0.7)
 
-    plt.tight_layout()
+    fig.tight_layout()
 
-    output_path = os.path.join(output_dir, 'speedup.png')
-    plt.savefig(output_path, dpi=150)
-    plt.close()
-    print(f"  Graphique cree: {output_path}")
+    output_path = output_dir / 'speedup.png'
+    fig.savefig(output_path, **SAVE_KW)
+    return output_path
 
 
-def graph_components_comparison(results: List[ResultEntry], output_dir: str):
+def graph_components_comparison(agg: Dict, output_dir: Path) -> Optional[Path]:
     """
     Graphique 5: Verification de la coherence (nombre de composantes).
 
     Args:
-        results: Liste des resultats
+        agg: Agregats des resultats (voir compute_aggregates)
         output_dir: Repertoire de sortie
+
+    Returns:
+        Chemin du fichier PNG genere
     """
     if not MATPLOTLIB_AVAILABLE:
-        return
+        return None
 
     # Grouper par image
-    images = sorted(set(r.image for r in results))
+    images = agg['images']
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = _new_axes((12, 6))
 
     # Pour chaque image, verifier que tous les algorithmes trouvent le meme nombre
-    x = range(len(images))
+    x = np.arange(len(images))
     width = 0.15
-    algorithms = ['two_pass', 'union_find', 'kruskal', 'prim']
+    algorithms = COMPONENTS_ALGORITHMS
     offsets = [-1.5, -0.5, 0.5, 1.5]
 
-    for i, algo in enumerate(algorithms):
-        values = []
-        for img in images:
-            # Prendre connectivite 4
-            for r in results:
-                if r.image == img and r.algorithm == algo and r.connectivity == 4:
-                    values.append(r.num_components)
-                    break
-            else:
-                values.append(0)
-
-        color = ALGO_COLORS.get(algo, '#95a5a6')
-        label = ALGO_LABELS.get(algo, algo)
-        ax.bar([xi + offsets[i] * width for xi in x], values, width,
+    # Nombre de composantes par image et algorithme (connectivite 4)
+    table = agg['components_pivot']
+
+    # Couleurs et libelles resolus une fois, hors de la boucle de trace
+    colors = [ALGO_COLORS.get(a, '#95a5a6') for a in algorithms]
+    labels = [ALGO_LABELS.get(a, a) for a in algorithms]
+
+    for i, (color, label) in enumerate(zip(colors, labels)):
+        values = table[:, i]
+        ax.bar(x + offsets[i] * width, values, width,
                label=label, color=color, edgecolor='black')
 
     ax.set_xlabel('Image', fontsize=12)
     ax.set_ylabel('Nombre de composantes', fontsize=12)
     ax.set_title('Verification de coherence: nombre de composantes connexes\n(Tous les algorithmes doivent trouver le meme nombre)', fontsize=14)
     ax.set_xticks(x)
-    ax.set_xticklabels([img[:15] + '...' if len(img) > 15 else img for img in images], rotation=45, ha='right')
+    ax.set_xticklabels(agg['image_labels'], rotation=45, ha='right')
     ax.legend()
     ax.grid(axis='y', linestyle='--', alpha=0.7)
 
-    plt.tight_layout()
+    fig.tight_layout()
+
+    output_path = output_dir / 'components_verification.png'
+    fig.savefig(output_path, **SAVE_KW)
+    return output_path
+
 
-    output_path = os.path.join(output_dir, 'components_verification.png')
-    plt.savefig(output_path, dpi=150)
-    plt.close()
-    print(f"  Graphique cree: {output_path}")
+# Graphiques generes par generate_all_graphs :
+# (fonction, fichier produit, agregats utilises par la fonction)
+GRAPHS = [
+    (graph_algorithm_comparison, 'comparison_algorithms.png',
+     ('algorithms', 'mean_time', 'std_time')),
+    (graph_image_comparison, 'comparison_images.png',
+     ('images', 'image_labels', 'image_algorithms', 'mean_pivot')),
+    (graph_connectivity_comparison, 'connectivity_comparison.png',
+     ('algorithms', 'mean_time_conn')),
+    (graph_speedup, 'speedup.png',
+     ('algorithms', 'mean_time')),
+    (graph_components_comparison, 'components_verification.png',
+     ('images', 'image_labels', 'components_pivot')),
+]
 
+# Version du rendu des graphiques : a incrementer quand une fonction de
+# trace change, pour invalider les PNG deja generes
+GRAPHS_VERSION = 1
 
-def generate_all_graphs(csv_path: str, output_dir: str):
+# Repertoire des empreintes de donnees de chaque graphique
+FIGURE_HASH_DIR = '.hashes'
+
+# Empreinte du CSV ayant servi a generer les graphiques du repertoire
+CACHE_HASH_FILE = '.cache_hash'
+
+
+def csv_hash(csv_path: str) -> str:
+    """Empreinte (blake2b) du contenu d'un fichier CSV."""
+    with open(csv_path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def graphs_up_to_date(output_dir: Path, digest: str) -> bool:
+    """
+    Indique si les graphiques de `output_dir` correspondent deja au CSV.
+
+    Args:
+        output_dir: Repertoire des graphiques
+        digest: Empreinte du CSV courant et des parametres de rendu
+                (voir csv_hash et render_hash)
+
+    Returns:
+        True si tous les PNG existent et ont ete generes depuis ce CSV
+    """
+    try:
+        if (output_dir / CACHE_HASH_FILE).read_text(encoding='utf-8').strip() != digest:
+            return False
+    except OSError:
+        return False
+
+    return all((output_dir / filename).exists() for _, filename, _ in GRAPHS)
+
+
+def _update_hash(h, value) -> None:
+    """Ajoute une valeur d'agregat (tableau, liste, dict...) a une empreinte."""
+    if isinstance(value, np.ndarray):
+        h.update(str(value.dtype).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            h.update(repr(key).encode())
+            _update_hash(h, value[key])
+    else:
+        h.update(repr(value).encode())
+
+
+def render_hash() -> str:
+    """
+    Empreinte des parametres de rendu (GRAPHS_VERSION, SAVE_KW, RC_PARAMS).
+
+    Returns:
+        Empreinte hexadecimale (blake2b)
+    """
+    h = hashlib.blake2b(digest_size=8)
+    _update_hash(h, {'version': GRAPHS_VERSION, 'save': SAVE_KW, 'rc': RC_PARAMS})
+    return h.hexdigest()
+
+
+def figure_hash(agg: Dict, keys) -> str:
+    """
+    Empreinte des donnees tracees par un graphique et des parametres de
+    rendu (voir render_hash).
+
+    Args:
+        agg: Agregats (voir compute_aggregates)
+        keys: Agregats utilises par le graphique
+
+    Returns:
+        Empreinte hexadecimale (blake2b)
+    """
+    h = hashlib.blake2b(digest_size=8)
+    h.update(render_hash().encode())
+    for key in keys:
+        h.update(key.encode())
+        _update_hash(h, agg[key])
+    return h.hexdigest()
+
+
+def generate_all_graphs(csv_path: str, output_dir: str, force: bool = False):
     """
     Genere tous les graphiques.
 
+    Les graphiques ne sont pas regeneres si le CSV n'a pas change depuis
+    la derniere generation dans `output_dir` (sauf avec force=True). Si le
+    CSV a change, seuls les graphiques dont les donnees tracees ont change
+    sont redessines.
+
     Args:
         csv_path: Chemin du fichier CSV
         output_dir: Repertoire de sortie
+        force: Regenerer meme si les graphiques sont a jour
     """
     if not MATPLOTLIB_AVAILABLE:
         print("ERREUR: matplotlib n'est pas disponible")
         return
 
+    output_dir = Path(output_dir)
+
     print("=" * 60)
     print("  GENERATION DES GRAPHIQUES")
     print("=" * 60)
@@ -415,20 +633,58 @@ def generate_all_graphs(csv_path: str, output_dir: str):
         print(f"ERREUR: Fichier non trouve: {csv_path}")
         return
 
+    # CSV et parametres de rendu : changer l'un ou l'autre invalide le cache
+    digest = f"{csv_hash(csv_path)}-{render_hash()}"
+    if not force and graphs_up_to_date(output_dir, digest):
+        print(f"  CSV inchange, graphiques a jour dans: {output_dir} (cache)")
+        return
+
     results = load_csv(csv_path)
     print(f"  {len(results)} entrees chargees")
 
+    # Agregats partages par tous les graphiques, calcules une seule fois
+    agg = compute_aggregates(results)
+
     # Creer le repertoire de sortie
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     # Generer les graphiques
     print(f"\nGeneration des graphiques dans: {output_dir}")
 
-    graph_algorithm_comparison(results, output_dir)
-    graph_image_comparison(results, output_dir)
-    graph_connectivity_comparison(results, output_dir)
-    graph_speedup(results, output_dir)
-    graph_components_comparison(results, output_dir)
+    # Ne redessiner que les graphiques dont les donnees ont change
+    hash_dir = output_dir / FIGURE_HASH_DIR
+    hash_dir.mkdir(exist_ok=True)
+
+    to_render = []
+    unchanged = []
+    for graph_function, filename, keys in GRAPHS:
+        digest_file = hash_dir / f'{filename}.hash'
+        figure_digest = figure_hash(agg, keys)
+        if (not force and (output_dir / filename).exists() and digest_file.exists()
+                and digest_file.read_text(encoding='utf-8') == figure_digest):
+            unchanged.append(output_dir / filename)
+        else:
+            to_render.append((graph_function, digest_file, figure_digest))
+
+    # Les graphiques sont independants : un processus par graphique dans
+    # la limite des coeurs, chaque processus reutilise sa figure
+    output_paths = []
+    if to_render:
+        max_workers = min(len(to_render), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(graph_function, agg, output_dir)
+                       for graph_function, _, _ in to_render]
+            output_paths = [future.result() for future in futures]
+
+        for _, digest_file, figure_digest in to_render:
+            digest_file.write_text(figure_digest, encoding='utf-8')
+
+    # Un seul affichage une fois tous les graphiques ecrits (les processus
+    # n'ecrivent pas en parallele sur la sortie standard)
+    print("\n".join([f"  Graphique cree: {path}" for path in output_paths]
+                    + [f"  Graphique inchange: {path}" for path in unchanged]))
+
+    (output_dir / CACHE_HASH_FILE).write_text(digest, encoding='utf-8')
 
     print("\n" + "=" * 60)
     print("  Tous les graphiques ont ete generes!")
@@ -446,6 +702,8 @@ def main():
                         help='Fichier CSV des resultats')
     parser.add_argument('--output-dir', type=str, default='benchmarks/results/graphs',
                         help='Repertoire de sortie pour les graphiques')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerer les graphiques meme si le CSV n\'a pas change')
 
     args = parser.parse_args()
 
@@ -453,7 +711,7 @@ def main():
     project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     os.chdir(project_dir)
 
-    generate_all_graphs(args.input, args.output_dir)
+    generate_all_graphs(args.input, args.output_dir, args.force)
 
     return 0
 
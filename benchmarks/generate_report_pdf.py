@@ -19,65 +19,120 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 
 import sys
 import os
-import csv
-from datetime import datetime
+import hashlib
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import List, Dict
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from typing import List, Dict, Optional, Set, Tuple
 
+import fpdf
+import numpy as np
 from fpdf import FPDF
 
+# L'ancien PyFPDF (1.x) construit le document par concatenation de chaines,
+# en temps quadratique sur les gros rapports : seul fpdf2 est supporte
+if int(fpdf.FPDF_VERSION.split('.')[0]) < 2:
+    raise ImportError(
+        f"fpdf2 est requis (version installee : {fpdf.FPDF_VERSION}) - "
+        "pip uninstall fpdf && pip install fpdf2"
+    )
 
-# ============================================================================
-# Structure de donnees
-# ============================================================================
+# Niveau zlib des images du rapport. fpdf2 decode chaque PNG et recompresse
+# lui-meme ses pixels : recompresser les fichiers en amont (Pillow) ne
+# changerait rien, c'est ce niveau qui fixe la taille des flux d'images
+IMAGE_COMPRESSION_LEVEL = 9
 
-@dataclass
-class ResultEntry:
-    """Une entree de resultat."""
-    image: str
-    algorithm: str
-    connectivity: int
-    runs: int
-    mean_time: float
-    std_time: float
-    min_time: float
-    max_time: float
-    num_components: int
+# Chargeur commun avec generate_graphs.py (cache par fichier)
+from _csv_cache import load_csv
+
+
+# Noms affiches des algorithmes
+ALGO_LABELS = {
+    'two_pass': 'Two-Pass',
+    'union_find': 'Union-Find',
+    'kruskal': 'Kruskal',
+    'prim': 'Prim',
+    'opencv': 'OpenCV (ref.)'
+}
 
 
 # ============================================================================
 # Fonctions utilitaires
 # ============================================================================
 
-def manual_mean(values: List[float]) -> float:
-    """Calcule la moyenne."""
-    if not values:
-        return 0.0
-    return sum(values) / len(values)
+@dataclass
+class ReportStats:
+    """Agregats des resultats, calcules une fois et partages par les sections."""
+    runs: int                                # Nombre de runs par configuration
+    images: List[str]                        # Images testees (triees)
+    algo_means: List[Tuple[str, float]]      # (algo, moyenne), tri croissant
+    algo_std_means: Dict[str, float]         # Ecart-type moyen par algorithme
+    conn4_mean: Optional[float]              # Temps moyen en connectivite 4
+    conn8_mean: Optional[float]              # Temps moyen en connectivite 8
+    image_components: Dict[str, Set[int]]    # Composantes par image (conn. 4)
+
+
+def compute_report_stats(results: np.recarray) -> ReportStats:
+    """
+    Calcule les agregats du rapport.
 
+    Tout est calcule sur les colonnes du tableau de resultats (masques
+    booleens, regroupement par algorithme avec np.bincount, np.unique),
+    sans boucle Python sur les lignes.
 
-def load_csv(filepath: str) -> List[ResultEntry]:
-    """Charge les resultats depuis un fichier CSV."""
-    results = []
+    Args:
+        results: Resultats charges par load_csv
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    Returns:
+        Agregats utilises par create_results_section et create_conclusion
+    """
+    algorithms, first, algo_index = np.unique(
+        results.algorithm, return_index=True, return_inverse=True)
+    counts = np.bincount(algo_index, minlength=len(algorithms))
+    means = (np.bincount(algo_index, weights=results.mean_time,
+                         minlength=len(algorithms)) / counts).tolist()
+    std_means = (np.bincount(algo_index, weights=results.std_time,
+                             minlength=len(algorithms)) / counts).tolist()
+    names = algorithms.tolist()
+
+    # Ordre de premiere apparition dans le CSV, puis tri stable par temps
+    order = sorted(np.argsort(first, kind='stable').tolist(),
+                   key=means.__getitem__)
+
+    conn_means = {}
+    for connectivity in (4, 8):
+        times = results.mean_time[results.connectivity == connectivity]
+        conn_means[connectivity] = float(times.mean()) if times.size else None
+
+    # Couples (image, composantes) distincts en connectivite 4 : seuls ces
+    # quelques couples sont parcourus en Python, pas les lignes du CSV
+    conn4 = results.connectivity == 4
+    pairs = np.unique(results[['image', 'num_components']][conn4])
+    image_components: Dict[str, Set[int]] = defaultdict(set)
+    for image, components in pairs.tolist():
+        image_components[image].add(components)
+
+    return ReportStats(
+        runs=results[0].runs if len(results) else 5,
+        images=np.unique(results.image).tolist(),
+        algo_means=[(names[i], means[i]) for i in order],
+        algo_std_means=dict(zip(names, std_means)),
+        conn4_mean=conn_means[4],
+        conn8_mean=conn_means[8],
+        image_components=dict(image_components),
+    )
 
-        for row in reader:
-            entry = ResultEntry(
-                image=row['image'],
-                algorithm=row['algorithm'],
-                connectivity=int(row['connectivity']),
-                runs=int(row['runs']),
-                mean_time=float(row['mean_time_ms']),
-                std_time=float(row['std_time_ms']),
-                min_time=float(row['min_time_ms']),
-                max_time=float(row['max_time_ms']),
-                num_components=int(row['num_components'])
-            )
-            results.append(entry)
 
-    return results
+@lru_cache(maxsize=16)
+def _read_graph(filepath: str, mtime: float) -> bytes:
+    """
+    Lit un graphique PNG une seule fois par processus ; `mtime` ne sert
+    qu'a la cle du cache (un graphique regenere est relu).
+    """
+    with open(filepath, 'rb') as f:
+        return f.read()
 
 
 # ============================================================================
@@ -88,10 +143,35 @@ class RapportPDF(FPDF):
     """Classe PDF personnalisee pour le rapport."""
 
     def __init__(self):
+        # Derniers arguments de set_font / set_text_color et etat obtenu
+        self._font_key = None
+        self._font_state = None
+        self._text_color_key = None
+        self._text_color = None
         super().__init__()
         self.set_auto_page_break(auto=True, margin=15)
         self.set_margins(15, 15, 15)
 
+    def set_font(self, family=None, style='', size=0):
+        """
+        Selectionne la police ; les titres et paragraphes la redefinissent a
+        chaque appel, on ne repasse par fpdf que si elle change.
+        """
+        if ((family, style, size) == self._font_key
+                and (self.current_font, self.font_size_pt) == self._font_state):
+            return
+        super().set_font(family, style, size)
+        self._font_key = (family, style, size)
+        self._font_state = (self.current_font, self.font_size_pt)
+
+    def set_text_color(self, r, g=-1, b=-1):
+        """Selectionne la couleur du texte, sans reconversion si inchangee."""
+        if (r, g, b) == self._text_color_key and self.text_color is self._text_color:
+            return
+        super().set_text_color(r, g, b)
+        self._text_color_key = (r, g, b)
+        self._text_color = self.text_color
+
     def header(self):
         """En-tete de page."""
         if self.page_no() > 1:
@@ -116,7 +196,16 @@ class RapportPDF(FPDF):
         self.ln(5)
 
     def section_title(self, title: str):
-        """Titre de section."""
+        """
+        Titre de section.
+
+        Un titre ne reste pas seul en bas de page : si le titre et une
+        ligne de texte ne tiennent plus, on passe a la page suivante. Le
+        test est un simple calcul de hauteur (pas de rendu a blanc ni de
+        copie de l'etat du document, contrairement a start_section).
+        """
+        if self.y + 8 + 2 + 6 > self.page_break_trigger:
+            self.add_page()
         self.set_x(15)
         self.set_font('Helvetica', 'B', 12)
         self.set_text_color(51, 51, 51)
@@ -143,7 +232,7 @@ class RapportPDF(FPDF):
 # Generation du rapport
 # ============================================================================
 
-def create_cover_page(pdf: RapportPDF):
+def create_cover_page(pdf: RapportPDF, generated_at: datetime):
     """Cree la page de garde."""
     pdf.add_page()
 
@@ -182,7 +271,7 @@ def create_cover_page(pdf: RapportPDF):
     # Date
     pdf.set_font('Helvetica', 'I', 11)
     pdf.set_text_color(102, 102, 102)
-    pdf.cell(0, 8, datetime.now().strftime('%d %B %Y'), align='C', new_x='LMARGIN', new_y='NEXT')
+    pdf.cell(0, 8, generated_at.strftime('%d %B %Y'), align='C', new_x='LMARGIN', new_y='NEXT')
 
 
 def create_introduction(pdf: RapportPDF):
@@ -297,16 +386,8 @@ def create_algorithms_section(pdf: RapportPDF):
     )
 
 
-def create_architecture_section(pdf: RapportPDF):
-    """Cree la section architecture."""
-    pdf.add_page()
-    pdf.chapter_title('3. Architecture du Projet')
-
-    pdf.section_title('3.1 Structure des fichiers')
-    pdf.body_text("Le projet est organise selon une architecture modulaire :")
-
-    pdf.set_font('Courier', '', 9)
-    structure = """labellisation/
+# Arborescence affichee dans la section architecture
+ARCH_STRUCTURE = """labellisation/
   src/
     core/
       image.py          # Classes Image, LabelImage, Pixel
@@ -326,9 +407,18 @@ def create_architecture_section(pdf: RapportPDF):
   images/
     input/                  # Images de test"""
 
-    for line in structure.split('\n'):
-        pdf.set_x(15)
-        pdf.cell(0, 5, line, new_x='LMARGIN', new_y='NEXT')
+
+def create_architecture_section(pdf: RapportPDF):
+    """Cree la section architecture."""
+    pdf.add_page()
+    pdf.chapter_title('3. Architecture du Projet')
+
+    pdf.section_title('3.1 Structure des fichiers')
+    pdf.body_text("Le projet est organise selon une architecture modulaire :")
+
+    pdf.set_font('Courier', '', 9)
+    pdf.set_x(15)
+    pdf.multi_cell(0, 5, ARCH_STRUCTURE, new_x='LMARGIN', new_y='NEXT')
 
     pdf.ln(5)
     pdf.set_font('Helvetica', '', 10)
@@ -353,29 +443,30 @@ def create_architecture_section(pdf: RapportPDF):
     )
     pdf.set_font('Courier', '', 10)
     pdf.set_x(15)
-    pdf.cell(0, 6, "    @staticmethod", new_x='LMARGIN', new_y='NEXT')
-    pdf.set_x(15)
-    pdf.cell(0, 6, "    def label(image: Image, connectivity: int) -> LabelImage", new_x='LMARGIN', new_y='NEXT')
+    pdf.multi_cell(0, 6,
+        "    @staticmethod\n"
+        "    def label(image: Image, connectivity: int) -> LabelImage",
+        new_x='LMARGIN', new_y='NEXT'
+    )
     pdf.set_font('Helvetica', '', 10)
     pdf.body_text(
         "Cette uniformite permet de tester et comparer facilement les differentes implementations."
     )
 
 
-def create_results_section(pdf: RapportPDF, results: List[ResultEntry]):
+def create_results_section(pdf: RapportPDF, stats: ReportStats):
     """Cree la section resultats."""
     pdf.add_page()
     pdf.chapter_title('4. Resultats du Benchmark')
 
     pdf.section_title('4.1 Configuration des tests')
     pdf.body_text("Les tests ont ete effectues avec la configuration suivante :")
-    pdf.bullet_point(f"Nombre de runs par configuration : {results[0].runs if results else 5}")
+    pdf.bullet_point(f"Nombre de runs par configuration : {stats.runs}")
     pdf.bullet_point("Connectivites testees : 4 et 8 voisins")
     pdf.bullet_point("Algorithmes : Two-Pass, Union-Find, Kruskal, Prim")
 
-    images = sorted(set(r.image for r in results))
-    pdf.bullet_point(f"Images testees : {len(images)}")
-    for img in images:
+    pdf.bullet_point(f"Images testees : {len(stats.images)}")
+    for img in stats.images:
         pdf.set_font('Helvetica', '', 9)
         pdf.set_x(25)
         pdf.cell(0, 5, f"- {img}", new_x='LMARGIN', new_y='NEXT')
@@ -383,15 +474,7 @@ def create_results_section(pdf: RapportPDF, results: List[ResultEntry]):
     pdf.ln(5)
     pdf.section_title('4.2 Tableau des resultats')
 
-    # Calculer les moyennes par algorithme
-    algo_times: Dict[str, List[float]] = {}
-    for r in results:
-        if r.algorithm not in algo_times:
-            algo_times[r.algorithm] = []
-        algo_times[r.algorithm].append(r.mean_time)
-
-    sorted_algos = [(a, manual_mean(times)) for a, times in algo_times.items()]
-    sorted_algos.sort(key=lambda x: x[1])
+    sorted_algos = stats.algo_means
     reference = sorted_algos[0][1] if sorted_algos else 1.0
 
     # Tableau
@@ -409,24 +492,15 @@ def create_results_section(pdf: RapportPDF, results: List[ResultEntry]):
     pdf.set_font('Helvetica', '', 10)
     pdf.set_text_color(0, 0, 0)
 
-    algo_labels = {
-        'two_pass': 'Two-Pass',
-        'union_find': 'Union-Find',
-        'kruskal': 'Kruskal',
-        'prim': 'Prim'
-    }
-
     for i, (algo, avg) in enumerate(sorted_algos):
-        # Calculer l'ecart-type moyen
-        algo_stds = [r.std_time for r in results if r.algorithm == algo]
-        avg_std = manual_mean(algo_stds)
+        avg_std = stats.algo_std_means[algo]
         speedup = reference / avg if avg > 0 else 0
 
         fill = i % 2 == 0
         if fill:
             pdf.set_fill_color(240, 240, 240)
 
-        label = algo_labels.get(algo, algo)
+        label = ALGO_LABELS.get(algo, algo)
         pdf.set_x(15)
         pdf.cell(col_widths[0], 7, label, border=1, align='L', fill=fill)
         pdf.cell(col_widths[1], 7, f'{avg:.2f} ms', border=1, align='C', fill=fill)
@@ -438,8 +512,8 @@ def create_results_section(pdf: RapportPDF, results: List[ResultEntry]):
     pdf.section_title('4.3 Analyse des performances')
 
     if sorted_algos:
-        fastest = algo_labels.get(sorted_algos[0][0], sorted_algos[0][0])
-        slowest = algo_labels.get(sorted_algos[-1][0], sorted_algos[-1][0])
+        fastest = ALGO_LABELS.get(sorted_algos[0][0], sorted_algos[0][0])
+        slowest = ALGO_LABELS.get(sorted_algos[-1][0], sorted_algos[-1][0])
         ratio = sorted_algos[-1][1] / sorted_algos[0][1] if sorted_algos[0][1] > 0 else 1
 
         pdf.body_text(
@@ -453,12 +527,9 @@ def create_results_section(pdf: RapportPDF, results: List[ResultEntry]):
     pdf.ln(5)
     pdf.section_title('4.4 Impact de la connectivite')
 
-    conn4_times = [r.mean_time for r in results if r.connectivity == 4]
-    conn8_times = [r.mean_time for r in results if r.connectivity == 8]
-
-    if conn4_times and conn8_times:
-        avg4 = manual_mean(conn4_times)
-        avg8 = manual_mean(conn8_times)
+    if stats.conn4_mean is not None and stats.conn8_mean is not None:
+        avg4 = stats.conn4_mean
+        avg8 = stats.conn8_mean
         increase = ((avg8 - avg4) / avg4) * 100 if avg4 > 0 else 0
 
         pdf.body_text(
@@ -469,77 +540,69 @@ def create_results_section(pdf: RapportPDF, results: List[ResultEntry]):
         )
 
 
+# Graphiques inclus dans le rapport : (fichier, titre, description)
+GRAPHS = [
+    ('comparison_algorithms.png', 'Comparaison globale des algorithmes',
+     "Ce graphique presente le temps moyen d'execution de chaque algorithme, "
+     "calcule sur toutes les images et les deux connectivites."),
+    ('comparison_images.png', 'Comparaison par image',
+     "Performance de chaque algorithme pour chaque image de test "
+     "(connectivite 4 uniquement pour la lisibilite)."),
+    ('connectivity_comparison.png', 'Impact de la connectivite',
+     "Comparaison des temps d'execution entre connectivite 4 et 8 "
+     "pour chaque algorithme."),
+    ('speedup.png', 'Speedup relatif',
+     "Facteur d'acceleration par rapport a l'algorithme Two-Pass "
+     "(reference = 1.0)."),
+    ('components_verification.png', 'Verification de coherence',
+     "Nombre de composantes trouvees par chaque algorithme. "
+     "Tous doivent trouver le meme nombre pour une image donnee.")
+]
+
+
 def create_graphs_section(pdf: RapportPDF, graphs_dir: str):
     """Cree la section graphiques."""
     pdf.add_page()
     pdf.chapter_title('5. Graphiques')
 
-    graphs = [
-        ('comparison_algorithms.png', 'Comparaison globale des algorithmes',
-         "Ce graphique presente le temps moyen d'execution de chaque algorithme, "
-         "calcule sur toutes les images et les deux connectivites."),
-        ('comparison_images.png', 'Comparaison par image',
-         "Performance de chaque algorithme pour chaque image de test "
-         "(connectivite 4 uniquement pour la lisibilite)."),
-        ('connectivity_comparison.png', 'Impact de la connectivite',
-         "Comparaison des temps d'execution entre connectivite 4 et 8 "
-         "pour chaque algorithme."),
-        ('speedup.png', 'Speedup relatif',
-         "Facteur d'acceleration par rapport a l'algorithme Two-Pass "
-         "(reference = 1.0)."),
-        ('components_verification.png', 'Verification de coherence',
-         "Nombre de composantes trouvees par chaque algorithme. "
-         "Tous doivent trouver le meme nombre pour une image donnee.")
-    ]
-
-    for i, (filename, title, description) in enumerate(graphs):
+    # Une seule lecture du repertoire au lieu d'un stat par graphique
+    try:
+        with os.scandir(graphs_dir) as it:
+            present = {entry.name: entry for entry in it}
+    except OSError:
+        present = {}
+
+    for i, (filename, title, description) in enumerate(GRAPHS):
         if i > 0 and i % 2 == 0:
             pdf.add_page()
 
-        filepath = os.path.join(graphs_dir, filename)
-
         pdf.section_title(f'5.{i+1} {title}')
         pdf.body_text(description)
 
-        if os.path.exists(filepath):
+        entry = present.get(filename)
+        if entry is not None:
             # Calculer la largeur pour centrer l'image
             img_width = 160
             x = (210 - img_width) / 2  # Centrer sur page A4
-            pdf.image(filepath, x=x, w=img_width)
+            data = _read_graph(os.path.abspath(entry.path), entry.stat().st_mtime)
+            pdf.image(BytesIO(data), x=x, w=img_width)
             pdf.ln(10)
         else:
             pdf.body_text(f"[Image non trouvee : {filename}]")
             pdf.ln(10)
 
 
-def create_conclusion(pdf: RapportPDF, results: List[ResultEntry]):
+def create_conclusion(pdf: RapportPDF, stats: ReportStats, generated_at: datetime):
     """Cree la section conclusion."""
     pdf.add_page()
     pdf.chapter_title('6. Conclusion')
 
     pdf.section_title('6.1 Synthese des resultats')
 
-    # Calculer les statistiques finales
-    algo_times: Dict[str, List[float]] = {}
-    for r in results:
-        if r.algorithm not in algo_times:
-            algo_times[r.algorithm] = []
-        algo_times[r.algorithm].append(r.mean_time)
-
-    sorted_algos = [(a, manual_mean(times)) for a, times in algo_times.items()]
-    sorted_algos.sort(key=lambda x: x[1])
-
-    algo_labels = {
-        'two_pass': 'Two-Pass',
-        'union_find': 'Union-Find',
-        'kruskal': 'Kruskal',
-        'prim': 'Prim'
-    }
-
     pdf.body_text("Les tests ont permis d'etablir un classement clair des performances :")
 
-    for i, (algo, avg) in enumerate(sorted_algos, 1):
-        label = algo_labels.get(algo, algo)
+    for i, (algo, avg) in enumerate(stats.algo_means, 1):
+        label = ALGO_LABELS.get(algo, algo)
         pdf.bullet_point(f"{i}. {label} : {avg:.2f} ms en moyenne")
 
     pdf.ln(5)
@@ -566,15 +629,8 @@ def create_conclusion(pdf: RapportPDF, results: List[ResultEntry]):
     pdf.section_title('6.3 Verification de coherence')
 
     # Verifier que tous les algorithmes trouvent le meme nombre de composantes
-    images = sorted(set(r.image for r in results))
-    all_consistent = True
-
-    for image in images:
-        image_results = [r for r in results if r.image == image and r.connectivity == 4]
-        components = set(r.num_components for r in image_results)
-        if len(components) > 1:
-            all_consistent = False
-            break
+    all_consistent = all(len(components) <= 1
+                         for components in stats.image_components.values())
 
     if all_consistent:
         pdf.body_text(
@@ -608,18 +664,77 @@ def create_conclusion(pdf: RapportPDF, results: List[ResultEntry]):
     pdf.set_text_color(102, 102, 102)
     pdf.multi_cell(0, 6,
         "Ce rapport a ete genere automatiquement a partir des resultats du benchmark. "
-        f"Date de generation : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        f"Date de generation : {generated_at.strftime('%Y-%m-%d %H:%M:%S')}"
     )
 
 
-def generate_pdf_report(csv_path: str, graphs_dir: str, output_path: str):
+# Suffixe du fichier d'empreinte ecrit a cote du PDF
+SIGNATURE_SUFFIX = '.sig'
+
+# Version du rapport : a incrementer quand la mise en page ou le texte
+# change (le source de ce module est aussi inclus dans l'empreinte)
+REPORT_VERSION = 1
+
+
+def report_hash(csv_path: str, graphs_dir: str) -> str:
+    """
+    Empreinte (blake2b) des entrees du rapport : version et source de ce
+    module, contenu du CSV et des graphiques inclus (un graphique absent
+    compte aussi).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(REPORT_VERSION).encode())
+    # Un changement du code ou du texte du rapport invalide le PDF
+    with open(os.path.abspath(__file__), 'rb') as f:
+        h.update(f.read())
+
+    with open(csv_path, 'rb') as f:
+        h.update(f.read())
+
+    for filename, _, _ in GRAPHS:
+        h.update(filename.encode())
+        try:
+            with open(os.path.join(graphs_dir, filename), 'rb') as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b'\0')
+
+    return h.hexdigest()
+
+
+def report_up_to_date(output_path: str, digest: str) -> bool:
+    """
+    Indique si le PDF `output_path` a deja ete genere depuis ces entrees.
+
+    Args:
+        output_path: Chemin du fichier PDF
+        digest: Empreinte des entrees courantes (voir report_hash)
+
+    Returns:
+        True si le PDF existe et que son empreinte correspond
+    """
+    if not os.path.exists(output_path):
+        return False
+    try:
+        with open(output_path + SIGNATURE_SUFFIX, 'r', encoding='utf-8') as f:
+            return f.read().strip() == digest
+    except OSError:
+        return False
+
+
+def generate_pdf_report(csv_path: str, graphs_dir: str, output_path: str,
+                        force: bool = False):
     """
     Genere le rapport PDF complet.
 
+    La generation est ignoree si le CSV et les graphiques sont identiques a
+    ceux du dernier rapport genere dans `output_path` (sauf avec force=True).
+
     Args:
         csv_path: Chemin du fichier CSV des resultats
         graphs_dir: Repertoire contenant les graphiques
         output_path: Chemin du fichier PDF de sortie
+        force: Regenerer meme si le rapport est a jour
     """
     print("=" * 60)
     print("  GENERATION DU RAPPORT PDF")
@@ -632,40 +747,71 @@ def generate_pdf_report(csv_path: str, graphs_dir: str, output_path: str):
         print(f"ERREUR: Fichier non trouve: {csv_path}")
         return False
 
+    digest = report_hash(csv_path, graphs_dir)
+    if not force and report_up_to_date(output_path, digest):
+        print(f"  Entrees inchangees, rapport a jour: {output_path} (cache)")
+        return True
+
     results = load_csv(csv_path)
     print(f"  {len(results)} entrees chargees")
 
+    # Agregats partages par les sections resultats et conclusion
+    stats = compute_report_stats(results)
+
     # Creer le PDF
     print("\nGeneration du PDF...")
 
-    pdf = RapportPDF()
-    pdf.alias_nb_pages()
+    # Reglage global de fpdf2 (absent des versions anterieures a 2.7),
+    # retabli apres la generation pour ne pas affecter les autres
+    # utilisateurs de fpdf dans le meme processus
+    image_settings = getattr(fpdf.image_parsing, 'SETTINGS', None)
+    if image_settings is not None:
+        previous_level = image_settings.compression_level
+        image_settings.compression_level = IMAGE_COMPRESSION_LEVEL
+
+    try:
+        pdf = RapportPDF()
+        pdf.alias_nb_pages()
+
+        # Date lue une seule fois : page de garde et conclusion concordent
+        generated_at = datetime.now()
+
+        # Generer les sections
+        print("  - Page de garde")
+        create_cover_page(pdf, generated_at)
 
-    # Generer les sections
-    print("  - Page de garde")
-    create_cover_page(pdf)
+        print("  - Introduction")
+        create_introduction(pdf)
 
-    print("  - Introduction")
-    create_introduction(pdf)
+        print("  - Description des algorithmes")
+        create_algorithms_section(pdf)
 
-    print("  - Description des algorithmes")
-    create_algorithms_section(pdf)
+        print("  - Architecture du projet")
+        create_architecture_section(pdf)
 
-    print("  - Architecture du projet")
-    create_architecture_section(pdf)
+        print("  - Resultats du benchmark")
+        create_results_section(pdf, stats)
 
-    print("  - Resultats du benchmark")
-    create_results_section(pdf, results)
+        print("  - Graphiques")
+        create_graphs_section(pdf, graphs_dir)
 
-    print("  - Graphiques")
-    create_graphs_section(pdf, graphs_dir)
+        print("  - Conclusion")
+        create_conclusion(pdf, stats, generated_at)
 
-    print("  - Conclusion")
-    create_conclusion(pdf, results)
+        # Sauvegarder le PDF
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # fpdf2 ecrit son buffer directement dans le fichier ouvert (pas de
+        # copie intermediaire renvoyee a l'appelant)
+        with open(output_path, 'wb', buffering=1 << 18) as f:
+            pdf.output(f)
+    finally:
+        if image_settings is not None:
+            image_settings.compression_level = previous_level
 
-    # Sauvegarder le PDF
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    pdf.output(output_path)
+    with open(output_path + SIGNATURE_SUFFIX, 'w', encoding='utf-8') as f:
+        f.write(digest)
 
     print(f"\nRapport genere: {output_path}")
     print("=" * 60)
@@ -689,6 +835,8 @@ def main():
     parser.add_argument('--output', type=str,
                         default='benchmarks/results/rapport_complet.pdf',
                         help='Fichier PDF de sortie')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerer le rapport meme si ses entrees n\'ont pas change')
 
     args = parser.parse_args()
 
@@ -696,7 +844,8 @@ def main():
     project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     os.chdir(project_dir)
 
-    success = generate_pdf_report(args.input, args.graphs, args.output)
+    success = generate_pdf_report(args.input, args.graphs, args.output,
+                                  args.force)
 
     return 0 if success else 1
 
@@ -15,8 +15,21 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 
 import sys
 import os
-import subprocess
+import importlib.util
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from statistics import fmean
+
+# Ajouter le repertoire benchmarks au path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Importe une seule fois au chargement du module ; si numpy ou OpenCV
+# manquent, l'erreur est signalee par check_dependencies
+try:
+    from scientific_benchmark import ScientificBenchmark
+except ImportError:
+    ScientificBenchmark = None
 
 
 def print_header(text: str):
@@ -30,32 +43,21 @@ def check_dependencies():
     """Verifie que les dependances sont installees."""
     print_header("VERIFICATION DES DEPENDANCES")
 
-    dependencies = {
-        'numpy': False,
-        'cv2': False,
-        'matplotlib': False
+    # find_spec localise les modules sans les importer (matplotlib en
+    # particulier est long a charger)
+    packages = {
+        'numpy': ("numpy", "numpy - pip install numpy"),
+        'cv2': ("opencv (cv2)", "opencv - pip install opencv-python"),
+        'matplotlib': ("matplotlib", "matplotlib - pip install matplotlib")
     }
 
-    try:
-        import numpy
-        dependencies['numpy'] = True
-        print("  [OK] numpy")
-    except ImportError:
-        print("  [MANQUANT] numpy - pip install numpy")
-
-    try:
-        import cv2
-        dependencies['cv2'] = True
-        print("  [OK] opencv (cv2)")
-    except ImportError:
-        print("  [MANQUANT] opencv - pip install opencv-python")
-
-    try:
-        import matplotlib
-        dependencies['matplotlib'] = True
-        print("  [OK] matplotlib")
-    except ImportError:
-        print("  [MANQUANT] matplotlib - pip install matplotlib")
+    dependencies = {}
+    for module, (found, missing) in packages.items():
+        dependencies[module] = importlib.util.find_spec(module) is not None
+        if dependencies[module]:
+            print(f"  [OK] {found}")
+        else:
+            print(f"  [MANQUANT] {missing}")
 
     # numpy et cv2 sont obligatoires, matplotlib est optionnel
     if not dependencies['numpy'] or not dependencies['cv2']:
@@ -81,9 +83,6 @@ def run_benchmark(num_runs: int, input_dir: str, output_csv: str):
     """
     print_header("EXECUTION DU BENCHMARK")
 
-    # Importer et executer le benchmark
-    from scientific_benchmark import ScientificBenchmark
-
     benchmark = ScientificBenchmark(num_runs=num_runs)
     benchmark.run(input_dir)
     benchmark.export_csv(output_csv)
@@ -100,114 +99,122 @@ def generate_graphs(csv_path: str, output_dir: str):
         csv_path: Chemin du fichier CSV
         output_dir: Repertoire de sortie
     """
-    try:
-        import matplotlib
-        print_header("GENERATION DES GRAPHIQUES")
+    # Presence verifiee sans importer matplotlib : il n'est charge que par
+    # les processus qui dessinent effectivement les graphiques
+    if importlib.util.find_spec('matplotlib') is None:
+        print("\n  ATTENTION: matplotlib non disponible - graphiques ignores")
+        return
 
-        from generate_graphs import generate_all_graphs
-        generate_all_graphs(csv_path, output_dir)
+    print_header("GENERATION DES GRAPHIQUES")
 
-    except ImportError:
-        print("\n  ATTENTION: matplotlib non disponible - graphiques ignores")
+    from generate_graphs import generate_all_graphs
+    generate_all_graphs(csv_path, output_dir)
 
 
-def generate_report(results, output_path: str, num_runs: int):
+def generate_report(csv_path: str, output_path: str, num_runs: int):
     """
     Genere un rapport texte recapitulatif.
 
+    Le rapport est construit depuis le CSV exporte par le benchmark, comme
+    les graphiques, ce qui permet de le generer en parallele de ceux-ci.
+
     Args:
-        results: Resultats du benchmark
+        csv_path: Chemin du fichier CSV des resultats
         output_path: Chemin du fichier de sortie
         num_runs: Nombre de runs effectues
     """
     print_header("GENERATION DU RAPPORT")
 
-    # Fonctions utilitaires
-    def manual_mean(values):
-        if not values:
-            return 0.0
-        return sum(values) / len(values)
+    from _csv_cache import ResultEntry, load_csv
+    # Entrees en types Python natifs (affichage des ensembles de composantes)
+    results = list(map(ResultEntry._make, load_csv(csv_path).tolist()))
 
-    # Creer le repertoire si necessaire
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # Index image -> connectivite -> resultats et temps par algorithme,
+    # construits en une seule passe
+    by_image = defaultdict(lambda: defaultdict(list))
+    algo_times = defaultdict(list)
+    for r in results:
+        by_image[r.image][r.connectivity].append(r)
+        algo_times[r.algorithm].append(r.mean_time)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("=" * 70 + "\n")
-        f.write("  RAPPORT DE BENCHMARK - LABELLISATION DES COMPOSANTES CONNEXES\n")
-        f.write("=" * 70 + "\n\n")
+    # Creer le repertoire si necessaire (aucun pour un simple nom de fichier)
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
 
-        f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Nombre de runs: {num_runs}\n\n")
+    # Le rapport est assemble en memoire puis ecrit en un seul appel
+    parts = []
+    write = parts.append
 
-        # Resume par algorithme
-        f.write("-" * 70 + "\n")
-        f.write("  RESUME PAR ALGORITHME\n")
-        f.write("-" * 70 + "\n\n")
+    write("=" * 70 + "\n")
+    write("  RAPPORT DE BENCHMARK - LABELLISATION DES COMPOSANTES CONNEXES\n")
+    write("=" * 70 + "\n\n")
 
-        algo_times = {}
-        for r in results:
-            if r.algorithm not in algo_times:
-                algo_times[r.algorithm] = []
-            algo_times[r.algorithm].append(r.mean_time)
+    write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    write(f"Nombre de runs: {num_runs}\n\n")
 
-        # Trier par temps moyen
-        sorted_algos = [(a, manual_mean(times)) for a, times in algo_times.items()]
-        sorted_algos.sort(key=lambda x: x[1])
+    # Resume par algorithme
+    write("-" * 70 + "\n")
+    write("  RESUME PAR ALGORITHME\n")
+    write("-" * 70 + "\n\n")
 
-        reference = sorted_algos[0][1] if sorted_algos else 1.0
+    # Trier par temps moyen
+    sorted_algos = [(a, fmean(times)) for a, times in algo_times.items()]
+    sorted_algos.sort(key=lambda x: x[1])
 
-        f.write(f"{'Algorithme':<15} {'Temps moyen':>12} {'Speedup':>10}\n")
-        f.write("-" * 40 + "\n")
+    reference = sorted_algos[0][1] if sorted_algos else 1.0
 
-        for algo, avg in sorted_algos:
-            speedup = reference / avg if avg > 0 else 0
-            f.write(f"{algo:<15} {avg:>10.2f} ms {speedup:>9.2f}x\n")
+    write(f"{'Algorithme':<15} {'Temps moyen':>12} {'Speedup':>10}\n")
+    write("-" * 40 + "\n")
 
-        # Details par image
-        f.write("\n" + "-" * 70 + "\n")
-        f.write("  DETAILS PAR IMAGE\n")
-        f.write("-" * 70 + "\n\n")
+    for algo, avg in sorted_algos:
+        speedup = reference / avg if avg > 0 else 0
+        write(f"{algo:<15} {avg:>10.2f} ms {speedup:>9.2f}x\n")
 
-        images = sorted(set(r.image_name for r in results))
+    # Details par image
+    write("\n" + "-" * 70 + "\n")
+    write("  DETAILS PAR IMAGE\n")
+    write("-" * 70 + "\n\n")
 
-        for image in images:
-            f.write(f"\n  Image: {image}\n")
-            f.write("  " + "-" * 50 + "\n")
+    images = sorted(by_image)
 
-            image_results = [r for r in results if r.image_name == image]
+    for image in images:
+        write(f"\n  Image: {image}\n")
+        write("  " + "-" * 50 + "\n")
 
-            for connectivity in [4, 8]:
-                f.write(f"\n    Connectivite {connectivity}:\n")
-                conn_results = [r for r in image_results if r.connectivity == connectivity]
+        for connectivity in [4, 8]:
+            write(f"\n    Connectivite {connectivity}:\n")
 
-                for r in sorted(conn_results, key=lambda x: x.mean_time):
-                    f.write(f"      {r.algorithm:<12}: {r.mean_time:8.2f} ms "
-                            f"(+/- {r.std_time:6.2f}) | {r.num_components} composantes\n")
+            for r in sorted(by_image[image][connectivity], key=lambda x: x.mean_time):
+                write(f"      {r.algorithm:<12}: {r.mean_time:8.2f} ms "
+                      f"(+/- {r.std_time:6.2f}) | {r.num_components} composantes\n")
 
-        # Verification de coherence
-        f.write("\n" + "-" * 70 + "\n")
-        f.write("  VERIFICATION DE COHERENCE\n")
-        f.write("-" * 70 + "\n\n")
+    # Verification de coherence
+    write("\n" + "-" * 70 + "\n")
+    write("  VERIFICATION DE COHERENCE\n")
+    write("-" * 70 + "\n\n")
 
-        all_consistent = True
-        for image in images:
-            image_results = [r for r in results if r.image_name == image and r.connectivity == 4]
-            components = set(r.num_components for r in image_results)
+    all_consistent = True
+    for image in images:
+        components = set(r.num_components for r in by_image[image][4])
 
-            if len(components) == 1:
-                f.write(f"  [OK] {image}: {components.pop()} composantes\n")
-            else:
-                f.write(f"  [ERREUR] {image}: valeurs differentes! {components}\n")
-                all_consistent = False
-
-        if all_consistent:
-            f.write("\n  Tous les algorithmes trouvent le meme nombre de composantes.\n")
+        if len(components) == 1:
+            write(f"  [OK] {image}: {components.pop()} composantes\n")
         else:
-            f.write("\n  ATTENTION: Incoherence detectee!\n")
+            write(f"  [ERREUR] {image}: valeurs differentes! {components}\n")
+            all_consistent = False
+
+    if all_consistent:
+        write("\n  Tous les algorithmes trouvent le meme nombre de composantes.\n")
+    else:
+        write("\n  ATTENTION: Incoherence detectee!\n")
 
-        f.write("\n" + "=" * 70 + "\n")
-        f.write("  FIN DU RAPPORT\n")
-        f.write("=" * 70 + "\n")
+    write("\n" + "=" * 70 + "\n")
+    write("  FIN DU RAPPORT\n")
+    write("=" * 70 + "\n")
+
+    with open(output_path, 'w', encoding='utf-8', buffering=1 << 18) as f:
+        f.write("".join(parts))
 
     print(f"  Rapport genere: {output_path}")
 
@@ -230,9 +237,6 @@ def main():
     project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     os.chdir(project_dir)
 
-    # Ajouter le repertoire benchmarks au path
-    sys.path.insert(0, os.path.join(project_dir, 'benchmarks'))
-
     print_header("BENCHMARK COMPLET - LABELLISATION")
     print(f"  Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"  Repertoire: {project_dir}")
@@ -258,11 +262,12 @@ def main():
         print("\n  ERREUR: Aucun resultat obtenu")
         return 1
 
-    # Generer les graphiques
-    generate_graphs(csv_path, graphs_dir)
-
-    # Generer le rapport
-    generate_report(results, report_path, args.runs)
+    # Graphiques et rapport ne dependent que du CSV : les graphiques sont
+    # generes dans un processus separe pendant l'ecriture du rapport
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        graphs = executor.submit(generate_graphs, csv_path, graphs_dir)
+        generate_report(csv_path, report_path, args.runs)
+        graphs.result()
 
     print_header("BENCHMARK TERMINE")
     print(f"  Resultats CSV:  {csv_path}")
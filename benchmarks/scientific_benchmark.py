@@ -9,7 +9,7 @@ Ce script effectue des tests rigoureux sur les 4 algorithmes avec:
 - Export des resultats en CSV
 
 Usage:
-    python scientific_benchmark.py [--runs N] [--output results.csv]
+    python scientific_benchmark.py [--runs N] [--jobs N] [--reference] [--output results.csv]
 
 Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 """
@@ -18,8 +18,12 @@ import sys
 import os
 import csv
 import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, field
-from typing import List, Dict, Tuple
+from functools import lru_cache
+from statistics import fmean, stdev
+from typing import List, Dict, Optional, Tuple
 
 # Ajouter le repertoire parent au path pour les imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -31,73 +35,7 @@ from src.algorithms.two_pass import TwoPass
 from src.algorithms.union_find import UnionFind
 from src.algorithms.kruskal import Kruskal
 from src.algorithms.prim import Prim
-from src.utils.utils import Timer
-
-
-# ============================================================================
-# Fonctions statistiques manuelles (pas de numpy)
-# ============================================================================
-
-def manual_mean(values: List[float]) -> float:
-    """Calcule la moyenne manuellement."""
-    if not values:
-        return 0.0
-    total = 0.0
-    for v in values:
-        total += v
-    return total / len(values)
-
-
-def manual_min(values: List[float]) -> float:
-    """Trouve le minimum manuellement."""
-    if not values:
-        return 0.0
-    result = values[0]
-    for v in values[1:]:
-        if v < result:
-            result = v
-    return result
-
-
-def manual_max(values: List[float]) -> float:
-    """Trouve le maximum manuellement."""
-    if not values:
-        return 0.0
-    result = values[0]
-    for v in values[1:]:
-        if v > result:
-            result = v
-    return result
-
-
-def manual_sqrt(x: float) -> float:
-    """Calcule la racine carree manuellement (Newton-Raphson)."""
-    if x < 0:
-        raise ValueError("Racine carree d'un nombre negatif")
-    if x == 0:
-        return 0.0
-
-    guess = x / 2.0
-    for _ in range(50):  # 50 iterations suffisent
-        new_guess = (guess + x / guess) / 2.0
-        if abs(new_guess - guess) < 1e-10:
-            break
-        guess = new_guess
-    return guess
-
-
-def manual_std(values: List[float]) -> float:
-    """Calcule l'ecart-type manuellement."""
-    if len(values) < 2:
-        return 0.0
-
-    m = manual_mean(values)
-    variance = 0.0
-    for v in values:
-        diff = v - m
-        variance += diff * diff
-    variance /= (len(values) - 1)  # Ecart-type echantillon
-    return manual_sqrt(variance)
+from src.algorithms.opencv_backend import OpenCVCCL, OPENCV_AVAILABLE
 
 
 # ============================================================================
@@ -114,21 +52,125 @@ class BenchmarkResult:
     runs: int
     times: List[float] = field(default_factory=list)
 
+    # Statistiques de la bibliotheque standard (implementees en C) ;
+    # l'ecart-type est celui de l'echantillon (n - 1)
+
     @property
     def mean_time(self) -> float:
-        return manual_mean(self.times)
+        return fmean(self.times) if self.times else 0.0
 
     @property
     def std_time(self) -> float:
-        return manual_std(self.times)
+        return stdev(self.times) if len(self.times) > 1 else 0.0
 
     @property
     def min_time(self) -> float:
-        return manual_min(self.times)
+        return min(self.times, default=0.0)
 
     @property
     def max_time(self) -> float:
-        return manual_max(self.times)
+        return max(self.times, default=0.0)
+
+
+# ============================================================================
+# Execution d'une configuration (dans un processus de travail)
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def load_image(image_path: str) -> Image:
+    """
+    Charge et binarise une image, une seule fois par processus.
+
+    Les images chargees par le processus principal avant le lancement des
+    processus de travail sont heritees par ceux-ci (fork) sans relecture.
+
+    Args:
+        image_path: Chemin de l'image
+
+    Returns:
+        Image binarisee
+    """
+    image = ImageIO.read_image(image_path)
+    image.binarize(128)
+    return image
+
+
+def run_single_test(image: Image, algorithm_name: str,
+                    connectivity: int) -> Tuple[float, int]:
+    """
+    Execute un seul test.
+
+    Seul l'appel a label() est chronometre, avec perf_counter_ns
+    (resolution nanoseconde) : l'image est preparee par l'appelant.
+
+    Args:
+        image: Image a traiter (non modifiee par les algorithmes)
+        algorithm_name: Nom de l'algorithme
+        connectivity: Connectivite (4 ou 8)
+
+    Returns:
+        Tuple (temps en ms, nombre de composantes)
+    """
+    algorithms = ScientificBenchmark.ALGORITHMS
+    if algorithm_name not in algorithms:
+        algorithms = ScientificBenchmark.REFERENCE_ALGORITHMS
+    label = algorithms[algorithm_name].label
+
+    start = time.perf_counter_ns()
+    labels = label(image, connectivity)
+    elapsed = (time.perf_counter_ns() - start) / 1e6
+
+    num_components = labels.count_labels()
+
+    return elapsed, num_components
+
+
+def run_configuration(image_path: str, algorithm_name: str, connectivity: int,
+                      num_runs: int, warmup: int) -> Tuple[BenchmarkResult, Optional[str]]:
+    """
+    Execute tous les runs d'une configuration (image, algorithme, connectivite).
+
+    Fonction de module, donc transmissible a un processus de travail. Les
+    runs d'une configuration s'enchainent dans le meme processus, sur un
+    seul coeur : la mesure de chaque run n'est pas affectee, seule la duree
+    totale du benchmark diminue.
+
+    Args:
+        image_path: Chemin de l'image
+        algorithm_name: Nom de l'algorithme
+        connectivity: Connectivite (4 ou 8)
+        num_runs: Nombre de runs chronometres
+        warmup: Nombre de runs d'echauffement non chronometres
+
+    Returns:
+        Tuple (resultat, message d'erreur ou None)
+    """
+    result = BenchmarkResult(
+        image_name=os.path.basename(image_path),
+        algorithm=algorithm_name,
+        connectivity=connectivity,
+        num_components=0,
+        runs=num_runs
+    )
+
+    # Copie de travail faite une fois, hors de toute mesure, pour que
+    # l'image chargee ne soit jamais partagee avec les algorithmes
+    test_image = load_image(image_path).copy()
+
+    # Les `warmup` premiers runs ne sont pas mesures : caches et
+    # allocateur sont "chauds" quand les mesures commencent
+    for run in range(warmup + num_runs):
+        try:
+            elapsed, num_components = run_single_test(
+                test_image, algorithm_name, connectivity
+            )
+        except Exception as e:
+            return result, str(e)
+        if run >= warmup:
+            result.times.append(elapsed)
+            result.num_components = num_components
+
+    return result, None
 
 
 # ============================================================================
@@ -145,16 +187,32 @@ class ScientificBenchmark:
         'prim': Prim
     }
 
+    # Implementations natives de reference (hors projet), mesurees
+    # seulement sur demande et si la bibliotheque est installee
+    REFERENCE_ALGORITHMS = {'opencv': OpenCVCCL} if OPENCV_AVAILABLE else {}
+
     CONNECTIVITIES = [4, 8]
 
-    def __init__(self, num_runs: int = 10):
+    def __init__(self, num_runs: int = 10, warmup: int = 1,
+                 jobs: Optional[int] = None, reference: bool = False):
         """
         Initialise le benchmark.
 
         Args:
             num_runs: Nombre de runs par configuration
+            warmup: Nombre de runs d'echauffement non chronometres
+            jobs: Nombre de processus de travail (defaut: nombre de coeurs)
+            reference: Mesurer aussi les implementations de reference
         """
         self.num_runs = num_runs
+        self.warmup = warmup
+        self.jobs = jobs or os.cpu_count() or 1
+        # Noms des algorithmes mesures, dans l'ordre d'affichage
+        self.algorithms = list(self.ALGORITHMS)
+        if reference:
+            if not self.REFERENCE_ALGORITHMS:
+                print("ATTENTION: OpenCV non disponible - pas d'implementation de reference")
+            self.algorithms.extend(self.REFERENCE_ALGORITHMS)
         self.results: List[BenchmarkResult] = []
 
     def find_images(self, input_dir: str) -> List[str]:
@@ -178,98 +236,14 @@ class ScientificBenchmark:
         images.sort()
         return images
 
-    def run_single_test(self, image: Image, algorithm_name: str,
-                        connectivity: int) -> Tuple[float, int]:
-        """
-        Execute un seul test.
-
-        Args:
-            image: Image a traiter
-            algorithm_name: Nom de l'algorithme
-            connectivity: Connectivite (4 ou 8)
-
-        Returns:
-            Tuple (temps en ms, nombre de composantes)
-        """
-        # Copier l'image pour ne pas la modifier
-        test_image = image.copy()
-
-        algorithm_class = self.ALGORITHMS[algorithm_name]
-
-        timer = Timer()
-        timer.start()
-        labels = algorithm_class.label(test_image, connectivity)
-        elapsed = timer.stop()
-
-        num_components = labels.count_labels()
-
-        return elapsed, num_components
-
-    def benchmark_image(self, image_path: str) -> List[BenchmarkResult]:
-        """
-        Execute le benchmark sur une image.
-
-        Args:
-            image_path: Chemin de l'image
-
-        Returns:
-            Liste des resultats
-        """
-        image_name = os.path.basename(image_path)
-        print(f"\n{'='*60}")
-        print(f"Image: {image_name}")
-        print(f"{'='*60}")
-
-        # Charger l'image
-        try:
-            original_image = ImageIO.read_image(image_path)
-            original_image.binarize(128)
-            print(f"  Dimensions: {original_image.width} x {original_image.height}")
-            print(f"  Pixels: {original_image.size}")
-        except Exception as e:
-            print(f"  ERREUR: {e}")
-            return []
-
-        results = []
-
-        for connectivity in self.CONNECTIVITIES:
-            print(f"\n  Connectivite: {connectivity}")
-            print(f"  {'-'*50}")
-
-            for algo_name in self.ALGORITHMS.keys():
-                result = BenchmarkResult(
-                    image_name=image_name,
-                    algorithm=algo_name,
-                    connectivity=connectivity,
-                    num_components=0,
-                    runs=self.num_runs
-                )
-
-                print(f"    {algo_name:12s}: ", end="", flush=True)
-
-                for run in range(self.num_runs):
-                    try:
-                        elapsed, num_components = self.run_single_test(
-                            original_image, algo_name, connectivity
-                        )
-                        result.times.append(elapsed)
-                        result.num_components = num_components
-                        print(".", end="", flush=True)
-                    except Exception as e:
-                        print(f" ERREUR ({e})")
-                        break
-
-                if result.times:
-                    print(f" {result.mean_time:8.2f} ms (+/- {result.std_time:6.2f}) "
-                          f"| {result.num_components} comp.")
-                    results.append(result)
-
-        return results
-
     def run(self, input_dir: str) -> List[BenchmarkResult]:
         """
         Execute le benchmark complet.
 
+        Les configurations (image, connectivite, algorithme) sont
+        independantes : elles sont reparties sur `jobs` processus, puis les
+        resultats sont affiches et conserves dans l'ordre habituel.
+
         Args:
             input_dir: Repertoire contenant les images
 
@@ -281,8 +255,10 @@ class ScientificBenchmark:
         print("=" * 60)
         print(f"\nConfiguration:")
         print(f"  - Nombre de runs: {self.num_runs}")
-        print(f"  - Algorithmes: {', '.join(self.ALGORITHMS.keys())}")
+        print(f"  - Runs d'echauffement: {self.warmup}")
+        print(f"  - Algorithmes: {', '.join(self.algorithms)}")
         print(f"  - Connectivites: {self.CONNECTIVITIES}")
+        print(f"  - Processus: {self.jobs}")
 
         # Trouver les images
         images = self.find_images(input_dir)
@@ -295,11 +271,65 @@ class ScientificBenchmark:
         for img in images:
             print(f"  - {os.path.basename(img)}")
 
-        # Executer le benchmark
-        all_results = []
+        # Charger les images avant de lancer les processus de travail :
+        # les images illisibles sont ecartees, les autres sont heritees
+        valid_images = []
         for image_path in images:
-            results = self.benchmark_image(image_path)
-            all_results.extend(results)
+            try:
+                load_image(image_path)
+            except Exception as e:
+                print(f"\n  ERREUR ({os.path.basename(image_path)}): {e}")
+                continue
+            valid_images.append(image_path)
+
+        configurations = [
+            (image_path, algo_name, connectivity)
+            for image_path in valid_images
+            for connectivity in self.CONNECTIVITIES
+            for algo_name in self.algorithms
+        ]
+
+        print(f"\nExecution de {len(configurations)} configurations: ", end="", flush=True)
+
+        outcomes = {}
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            futures = {
+                executor.submit(run_configuration, *config,
+                                self.num_runs, self.warmup): config
+                for config in configurations
+            }
+            for future in as_completed(futures):
+                outcomes[futures[future]] = future.result()
+                print(".", end="", flush=True)
+        print()
+
+        # Affichage et resultats dans l'ordre image -> connectivite -> algorithme
+        all_results = []
+        for image_path in valid_images:
+            image = load_image(image_path)
+            print(f"\n{'='*60}")
+            print(f"Image: {os.path.basename(image_path)}")
+            print(f"{'='*60}")
+            print(f"  Dimensions: {image.width} x {image.height}")
+            print(f"  Pixels: {image.size}")
+
+            for connectivity in self.CONNECTIVITIES:
+                print(f"\n  Connectivite: {connectivity}")
+                print(f"  {'-'*50}")
+
+                for algo_name in self.algorithms:
+                    result, error = outcomes[(image_path, algo_name, connectivity)]
+
+                    print(f"    {algo_name:12s}: ", end="")
+                    if error is not None:
+                        print(f"ERREUR ({error}) ", end="")
+
+                    if result.times:
+                        print(f"{result.mean_time:8.2f} ms (+/- {result.std_time:6.2f}) "
+                              f"| {result.num_components} comp.")
+                        all_results.append(result)
+                    else:
+                        print()
 
         self.results = all_results
         return all_results
@@ -315,10 +345,22 @@ class ScientificBenchmark:
             print("Aucun resultat a exporter")
             return
 
-        # Creer le repertoire si necessaire
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        # Lignes construites en memoire puis ecrites en un seul writerows
+        rows = [
+            (r.image_name, r.algorithm, r.connectivity, r.runs,
+             f"{r.mean_time:.4f}", f"{r.std_time:.4f}",
+             f"{r.min_time:.4f}", f"{r.max_time:.4f}",
+             r.num_components)
+            for r in self.results
+        ]
+
+        # Creer le repertoire si necessaire (aucun pour un fichier local)
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        with open(output_path, 'w', newline='', encoding='utf-8',
+                  buffering=1 << 16) as f:
             writer = csv.writer(f)
 
             # En-tete
@@ -327,15 +369,7 @@ class ScientificBenchmark:
                 'mean_time_ms', 'std_time_ms', 'min_time_ms', 'max_time_ms',
                 'num_components'
             ])
-
-            # Donnees
-            for r in self.results:
-                writer.writerow([
-                    r.image_name, r.algorithm, r.connectivity, r.runs,
-                    f"{r.mean_time:.4f}", f"{r.std_time:.4f}",
-                    f"{r.min_time:.4f}", f"{r.max_time:.4f}",
-                    r.num_components
-                ])
+            writer.writerows(rows)
 
         print(f"\nResultats exportes vers: {output_path}")
 
@@ -364,7 +398,7 @@ class ScientificBenchmark:
         sorted_algos = []
 
         for algo, times in algo_times.items():
-            avg = manual_mean(times)
+            avg = fmean(times)
             sorted_algos.append((algo, avg))
 
         # Trier par temps
@@ -387,6 +421,12 @@ def main():
     )
     parser.add_argument('--runs', type=int, default=10,
                         help='Nombre de runs par configuration (defaut: 10)')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help="Runs d'echauffement non chronometres (defaut: 1)")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Nombre de processus (defaut: nombre de coeurs)')
+    parser.add_argument('--reference', action='store_true',
+                        help='Mesurer aussi OpenCV (cv2.connectedComponents) comme reference')
     parser.add_argument('--input', type=str, default='images/input',
                         help='Repertoire des images (defaut: images/input)')
     parser.add_argument('--output', type=str, default='benchmarks/results/benchmark_results.csv',
@@ -399,7 +439,8 @@ def main():
     os.chdir(project_dir)
 
     # Executer le benchmark
-    benchmark = ScientificBenchmark(num_runs=args.runs)
+    benchmark = ScientificBenchmark(num_runs=args.runs, warmup=args.warmup,
+                                    jobs=args.jobs, reference=args.reference)
     benchmark.run(args.input)
     benchmark.export_csv(args.output)
     benchmark.print_summary()
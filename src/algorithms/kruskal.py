@@ -27,43 +27,59 @@ Pour la labellisation, on adapte Kruskal :
 - On construit une FORÊT COUVRANTE (pas un seul arbre)
 - Chaque arbre de la forêt = une composante connexe
 
+Les poids étant tous égaux, n'importe quel ordre des arêtes est un ordre
+trié : l'étape de tri est donc omise, la forêt obtenue (et ses composantes)
+est la même.
+
 COMPLEXITÉ :
-- Temps: O(E log E) pour le tri des arêtes
+- Temps: O(E · α(N)) pour la fusion des arêtes (pas de tri)
   où E = nombre d'arêtes ≈ 2N pour connectivité 4, ≈ 4N pour connectivité 8
-- Espace: O(E + V) pour stocker le graphe
+- Espace: O(V) : les arêtes sont fusionnées dès leur production, ligne
+  par ligne, sans stocker le graphe complet
 
 Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 """
 
 import sys
 import os
-from typing import List, Tuple
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, compress, islice
+from operator import and_, gt
+from typing import Iterable, Iterator, List, Tuple, Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.image import Image, LabelImage
 
 
-@dataclass
-class Edge:
-    """
-    Structure représentant une arête du graphe.
-    u et v sont les index linéaires des pixels, weight est toujours 1.
-    """
-    u: int
-    v: int
-    weight: int = 1
+# Une arête relie deux pixels u et v (index linéaires). Le poids, toujours
+# 1, n'est pas stocké. Les arêtes sont produites par paquets de même
+# direction : (sources, décalage) représente les arêtes (u, u + décalage)
+# pour chaque u de sources. Seuls les index u sont énumérés (structure de
+# tableaux) : aucun tuple n'est créé par arête.
+EdgeBatch = Tuple[Iterable[int], int]
 
-    def __lt__(self, other: 'Edge') -> bool:
-        return self.weight < other.weight
+# Taille (en pixels) à partir de laquelle label(..., workers > 1) découpe
+# l'image en bandes : en dessous, le lancement des processus et le transfert
+# des données coûtent plus que le calcul
+PARALLEL_THRESHOLD = 1_000_000
 
 
 class DisjointSetKruskal:
     """
     Structure Union-Find pour Kruskal.
 
-    Identique à celle utilisée dans union_find.py
+    Proche de celle utilisée dans union_find.py
     (on la garde ici pour que chaque algorithme soit autonome)
+
+    L'union se fait par le plus petit index (la plus petite racine devient
+    le parent) plutôt que par rang : avec des arêtes énumérées dans l'ordre
+    de balayage, les arbres obtenus restent au moins aussi plats, et le
+    tableau des rangs disparaît. Invariant : parent[i] <= i.
+
+    Les parents sont dans une liste Python : un tableau compact
+    (array('q'), 8 octets par entrée au lieu d'environ 36) réduit la mémoire,
+    mais chaque lecture y recrée un objet entier et l'union devient nettement
+    plus lente.
     """
 
     def __init__(self, size: int):
@@ -74,7 +90,22 @@ class DisjointSetKruskal:
             size: Nombre d'éléments
         """
         self._parent = list(range(size))
-        self._rank = [0] * size
+
+    @classmethod
+    def from_parents(cls, parent: List[int]) -> 'DisjointSetKruskal':
+        """
+        Construit la structure à partir d'un tableau de parents existant.
+
+        Args:
+            parent: Tableau des parents (respectant parent[i] <= i),
+                    repris tel quel sans copie
+
+        Returns:
+            Nouvelle structure Union-Find
+        """
+        ds = cls(0)
+        ds._parent = parent
+        return ds
 
     def find(self, x: int) -> int:
         """
@@ -86,9 +117,14 @@ class DisjointSetKruskal:
         Returns:
             Représentant (racine) de l'ensemble
         """
-        if self._parent[x] != x:
-            self._parent[x] = self.find(self._parent[x])
-        return self._parent[x]
+        # Itératif, avec division de chemin (path halving) : chaque noeud
+        # parcouru est rattaché à son grand-parent. Pas de récursion, donc
+        # pas de RecursionError sur les longues chaînes.
+        parent = self._parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
 
     def unite(self, x: int, y: int) -> bool:
         """
@@ -107,16 +143,91 @@ class DisjointSetKruskal:
         if root_x == root_y:
             return False
 
-        if self._rank[root_x] < self._rank[root_y]:
-            self._parent[root_x] = root_y
-        elif self._rank[root_x] > self._rank[root_y]:
+        # Union par le minimum : la plus petite racine l'emporte
+        if root_x < root_y:
             self._parent[root_y] = root_x
         else:
-            self._parent[root_y] = root_x
-            self._rank[root_x] += 1
+            self._parent[root_x] = root_y
 
         return True
 
+    def flatten(self) -> List[int]:
+        """
+        Fait pointer chaque élément directement vers sa racine.
+
+        Un seul parcours croissant : comme parent[i] <= i, le parent de i a
+        déjà été traité et pointe sur sa racine, qu'il suffit de recopier.
+
+        Returns:
+            Tableau des parents, où parent[i] est la racine de i
+        """
+        parent = self._parent
+        for i in range(len(parent)):
+            parent[i] = parent[parent[i]]
+        return parent
+
+    def to_labels(self, foreground: Iterable[int]) -> List[int]:
+        """
+        Remplace, en place, chaque parent par le label final de l'élément.
+
+        Aplatissement et numérotation compacte en un seul parcours
+        croissant : comme parent[i] <= i, l'entrée du parent de i contient
+        déjà son label final quand on atteint i. Une racine "objet" reçoit
+        le label suivant (1, 2, 3... dans l'ordre de parcours), une racine
+        de fond le label 0. La structure n'est plus utilisable ensuite.
+
+        Args:
+            foreground: Valeur de chaque élément (0 = fond), dans l'ordre
+                        des index
+
+        Returns:
+            Tableau des labels (le tableau des parents, réécrit)
+        """
+        parent = self._parent
+        next_label = 0
+
+        for i, value in enumerate(foreground):
+            root = parent[i]
+            if root != i:
+                parent[i] = parent[root]
+            elif value:
+                next_label += 1
+                parent[i] = next_label
+            else:
+                parent[i] = 0
+
+        return parent
+
+    def unite_all(self, batches: Iterable[EdgeBatch]) -> None:
+        """
+        Fusionne les extrémités de toutes les arêtes.
+
+        Équivalent à appeler unite(u, u + décalage) pour chaque arête, mais
+        en une seule boucle : tableaux liés en variables locales, recherche
+        des racines écrite en ligne (avec compression par division de
+        chemin), sans appel de méthode par arête.
+
+        Args:
+            batches: Paquets d'arêtes (sources, décalage)
+        """
+        parent = self._parent
+
+        for sources, offset in batches:
+            for root_x in sources:
+                root_y = root_x + offset
+                while parent[root_x] != root_x:
+                    parent[root_x] = parent[parent[root_x]]
+                    root_x = parent[root_x]
+
+                while parent[root_y] != root_y:
+                    parent[root_y] = parent[parent[root_y]]
+                    root_y = parent[root_y]
+
+                if root_x < root_y:
+                    parent[root_y] = root_x
+                elif root_y < root_x:
+                    parent[root_x] = root_y
+
 
 class Kruskal:
     """
@@ -129,13 +240,19 @@ class Kruskal:
     """
 
     @staticmethod
-    def label(input_image: Image, connectivity: int = 4) -> LabelImage:
+    def label(input_image: Image, connectivity: int = 4,
+              out: Optional[LabelImage] = None, workers: int = 1) -> LabelImage:
         """
         Labellise les composantes connexes d'une image binaire.
 
         Args:
             input_image: Image binaire (0 = fond, 255 = objet)
             connectivity: Type de connectivité (4 ou 8)
+            out: Image de labels à réutiliser (mêmes dimensions), évite
+                 une allocation par appel
+            workers: Nombre de processus pour la fusion des arêtes ; au-delà
+                     de 1, les images d'au moins PARALLEL_THRESHOLD pixels
+                     sont traitées par bandes (voir _unite_strips)
 
         Returns:
             Image labellisée avec les composantes connexes
@@ -144,106 +261,191 @@ class Kruskal:
         height = input_image.height
         size = width * height
 
-        labels = LabelImage(width, height)
-        labels.fill(0)
-
-        """
-        Étape 1-2 : Construction et tri des arêtes
-        Note: toutes les arêtes ont poids=1, le tri est symbolique
-        mais fidèle à l'algorithme de Kruskal classique.
-        """
-        edges = Kruskal._build_edges(input_image, connectivity)
-        edges.sort()
+        labels = LabelImage(width, height) if out is None else out.reset_for(input_image)
 
         """
-        Étape 3 : Kruskal - fusion des composantes via Union-Find
+        Étapes 1 à 3 : Énumération des arêtes et fusion via Union-Find
+        Note: toutes les arêtes ont poids=1, l'ordre de construction est
+        déjà un ordre trié : le tri (O(E log E)) ne changerait rien.
+        Les arêtes sont fusionnées au fur et à mesure de leur production,
+        sans liste intermédiaire.
         """
-        ds = DisjointSetKruskal(size)
-        for edge in edges:
-            ds.unite(edge.u, edge.v)
+        if workers > 1 and size >= PARALLEL_THRESHOLD:
+            ds = Kruskal._unite_strips(input_image, connectivity, workers)
+        else:
+            ds = DisjointSetKruskal(size)
+            ds.unite_all(Kruskal._build_edges(input_image, connectivity))
 
         """
         Étape 4 : Labellisation - remapper en labels compacts
         """
-        root_to_label = [0] * size
-        next_label = 1
-
-        for x in range(height):
-            for y in range(width):
-                if input_image.at(x, y) == 0:
-                    labels.set_at(x, y, 0)
-                    continue
-
-                idx = Kruskal._get_index(x, y, width)
-                root = ds.find(idx)
-
-                if root_to_label[root] == 0:
-                    root_to_label[root] = next_label
-                    next_label += 1
+        # Aplatissement et numérotation fusionnés (voir to_labels) : un seul
+        # parcours au lieu de trois (aplatir, numéroter les racines, traduire)
+        flat_labels = ds.to_labels(chain.from_iterable(input_image.data))
 
-                labels.set_at(x, y, root_to_label[root])
+        # Chaque ligne de labels est une tranche du tableau obtenu
+        for x, label_row in enumerate(labels.data):
+            base = x * width
+            label_row[:] = flat_labels[base:base + width]
 
         return labels
 
     @staticmethod
-    def _build_edges(input_image: Image, connectivity: int) -> List[Edge]:
+    def _unite_strips(input_image: Image, connectivity: int,
+                      workers: int) -> DisjointSetKruskal:
         """
-        Construit la liste des arêtes du graphe.
+        Fusionne les arêtes de l'image découpée en bandes horizontales.
 
-        Une arête existe entre deux pixels si :
-        1. Les deux pixels sont "objet" (valeur != 0)
-        2. Les deux pixels sont adjacents (selon la connectivité)
-
-        Pour éviter les arêtes en double, on ne crée des arêtes que vers
-        les voisins "avant" (Nord et Ouest pour 4-conn, + diagonales pour 8-conn)
+        1. Chaque bande est traitée dans son propre processus : ses arêtes
+           internes sont fusionnées et la racine de chaque pixel est
+           renvoyée (en index global).
+        2. Les tableaux obtenus sont mis bout à bout : c'est une forêt
+           valide pour toute l'image, où seules les arêtes qui traversent
+           une frontière entre bandes manquent encore.
+        3. Ces arêtes de jointure (au plus ~3·W par frontière) sont
+           fusionnées dans le processus principal.
 
         Args:
             input_image: Image binaire
             connectivity: Connectivité (4 ou 8)
+            workers: Nombre de processus (et de bandes)
 
         Returns:
-            Liste des arêtes
+            Structure Union-Find couvrant toute l'image
         """
-        edges = []
         width = input_image.width
         height = input_image.height
+        pixels = input_image.data
+
+        # Premières lignes des bandes, réparties au plus juste
+        num_strips = min(workers, height)
+        starts = [height * k // num_strips for k in range(num_strips)]
+        bounds = list(zip(starts, starts[1:] + [height]))
+
+        with ProcessPoolExecutor(max_workers=num_strips) as executor:
+            strip_roots = executor.map(
+                _unite_strip,
+                [pixels[start:end] for start, end in bounds],
+                [connectivity] * num_strips,
+                [start * width for start, _ in bounds])
+            ds = DisjointSetKruskal.from_parents(list(chain.from_iterable(strip_roots)))
+
+        # Jointures : arêtes entre la dernière ligne d'une bande et la
+        # première de la suivante. Sur l'image de deux lignes, les deux
+        # premiers paquets sont les arêtes Ouest de chaque ligne, déjà
+        # traitées dans les bandes : seuls les suivants (Nord et
+        # diagonales) sont fusionnés
+        for start in starts[1:]:
+            seam = Image()
+            seam.data = pixels[start - 1:start + 1]
+            first = (start - 1) * width
+            ds.unite_all((map(first.__add__, sources), offset)
+                         for sources, offset in islice(
+                             Kruskal._build_edges(seam, connectivity), 2, None))
+
+        return ds
 
-        for x in range(height):
-            for y in range(width):
-                if input_image.at(x, y) == 0:
-                    continue
-
-                current_idx = Kruskal._get_index(x, y, width)
-
-                if connectivity == 4:
-                    if x > 0 and input_image.at(x - 1, y) != 0:
-                        edges.append(Edge(current_idx, Kruskal._get_index(x - 1, y, width), 1))
-                    if y > 0 and input_image.at(x, y - 1) != 0:
-                        edges.append(Edge(current_idx, Kruskal._get_index(x, y - 1, width), 1))
+    @staticmethod
+    def _build_edges(input_image: Image, connectivity: int) -> Iterator[EdgeBatch]:
+        """
+        Énumère les arêtes du graphe.
 
-                elif connectivity == 8:
-                    if x > 0 and y > 0 and input_image.at(x - 1, y - 1) != 0:
-                        edges.append(Edge(current_idx, Kruskal._get_index(x - 1, y - 1, width), 1))
-                    if x > 0 and input_image.at(x - 1, y) != 0:
-                        edges.append(Edge(current_idx, Kruskal._get_index(x - 1, y, width), 1))
-                    if x > 0 and y < width - 1 and input_image.at(x - 1, y + 1) != 0:
-                        edges.append(Edge(current_idx, Kruskal._get_index(x - 1, y + 1, width), 1))
-                    if y > 0 and input_image.at(x, y - 1) != 0:
-                        edges.append(Edge(current_idx, Kruskal._get_index(x, y - 1, width), 1))
+        Une arête existe entre deux pixels si :
+        1. Les deux pixels sont "objet" (valeur != 0)
+        2. Les deux pixels sont adjacents (selon la connectivité)
 
-        return edges
+        Pour éviter les arêtes en double, on ne crée des arêtes que vers
+        les voisins "avant" (Nord et Ouest pour 4-conn, + diagonales pour 8-conn)
 
-    @staticmethod
-    def _get_index(x: int, y: int, width: int) -> int:
-        """
-        Convertit les coordonnées 2D en index 1D.
+        Les adjacences sont détectées ligne par ligne, sans boucle Python
+        par pixel : la ligne courante est comparée à elle-même décalée d'un
+        pixel (Ouest) et à la ligne précédente, décalée ou non (Nord et
+        diagonales). Ces comparaisons (map/compress) s'exécutent en C.
+
+        En connectivité 8, une arête diagonale n'est produite que si ses
+        deux extrémités ne sont pas déjà reliées par les autres arêtes :
+        - Nord-Ouest inutile si le Nord ou l'Ouest est "objet" (le pixel
+          rejoint le Nord-Ouest via l'un ou l'autre)
+        - Nord-Est inutile si le Nord est "objet" (voisin du Nord-Est)
+        De même, une arête Nord n'est produite que pour la première colonne
+        d'une suite de pixels reliés à la ligne précédente : dans la suite,
+        les arêtes Ouest relient déjà les pixels entre eux sur chacune des
+        deux lignes, une seule arête Nord suffit à joindre les deux.
+        Les composantes sont les mêmes, avec moins d'unions à effectuer.
+
+        Les arêtes sont produites à la demande, ligne après ligne et par
+        paquets d'une même direction (voir EdgeBatch) : ni la liste complète
+        (jusqu'à 4·H·W arêtes) ni un tuple par arête ne sont construits,
+        l'union consomme chaque ligne pendant que ses masques sont encore en
+        cache. Avec des poids uniformes et sans tri, Kruskal se ramène ainsi
+        à un Union-Find en un seul balayage (cf. union_find.py).
+
+        Le balayage ne lit que deux lignes à la fois (courante et
+        précédente) : un découpage en tuiles 2D ne réduirait pas les accès
+        mémoire et ajouterait une passe de couture entre tuiles. Le seul
+        découpage utile est celui en bandes de _unite_strips (une bande par
+        processus).
 
         Args:
-            x: Coordonnée ligne
-            y: Coordonnée colonne
-            width: Largeur de l'image
+            input_image: Image binaire
+            connectivity: Connectivité (4 ou 8)
 
         Returns:
-            Index linéaire
+            Itérateur sur les paquets d'arêtes (sources, décalage)
         """
-        return x * width + y
+        if connectivity not in (4, 8):
+            return
+
+        width = input_image.width
+        prev_fg = None
+
+        for x, row in enumerate(input_image.data):
+            base = x * width
+            # Pixels "objet" de la ligne (True/False)
+            fg = list(map(bool, row))
+            indexes = range(base, base + width)
+
+            # Ouest : (x, y) - (x, y-1)
+            yield compress(indexes[1:], map(and_, fg[1:], fg)), -1
+
+            if prev_fg is not None:
+                # Nord : (x, y) - (x-1, y), seulement pour la première
+                # colonne de chaque suite de pixels reliés verticalement
+                # (north_before[y] = north[y-1])
+                north = list(map(and_, fg, prev_fg))
+                north_before = [False]
+                north_before += north
+                yield compress(indexes, map(gt, north, north_before)), -width
+
+                if connectivity == 8:
+                    # Pixels "objet" dont le Nord est du fond : les seuls
+                    # candidats aux arêtes diagonales (a > b vaut "a et non b"
+                    # sur des booléens)
+                    lone = list(map(gt, fg, prev_fg))
+                    # Nord-Ouest : (x, y) - (x-1, y-1), sauf si l'Ouest est "objet"
+                    yield compress(indexes[1:], map(gt, map(and_, lone[1:], prev_fg), fg)), -width - 1
+                    # Nord-Est : (x, y) - (x-1, y+1)
+                    yield compress(indexes, map(and_, lone, prev_fg[1:])), -width + 1
+
+            prev_fg = fg
+
+
+def _unite_strip(rows: List[List[int]], connectivity: int, offset: int) -> List[int]:
+    """
+    Fusionne les arêtes internes d'une bande de lignes (voir
+    Kruskal._unite_strips). Fonction de module : exécutée dans un processus
+    de travail.
+
+    Args:
+        rows: Lignes de pixels de la bande
+        connectivity: Connectivité (4 ou 8)
+        offset: Index global du premier pixel de la bande
+
+    Returns:
+        Racine (index global) de chaque pixel de la bande
+    """
+    strip = Image()
+    strip.data = rows
+    ds = DisjointSetKruskal(strip.size)
+    ds.unite_all(Kruskal._build_edges(strip, connectivity))
+    return list(map(offset.__add__, ds.flatten()))
@@ -0,0 +1,85 @@
+"""
+Module algorithms/opencv_backend.py - Labellisation de référence via OpenCV
+
+Ce module ne fait PAS partie des quatre algorithmes du projet : il délègue
+la labellisation à cv2.connectedComponents, implémentation C++ optimisée
+(algorithmes à arbre de décision de type SAUF/BBDT/Spaghetti selon la
+version d'OpenCV).
+
+Il sert de point de comparaison pour les benchmarks : l'ordre de grandeur
+atteint par une bibliothèque native, face aux implémentations
+pédagogiques en Python pur.
+
+OpenCV est optionnel : sans lui, le module s'importe normalement mais
+OPENCV_AVAILABLE vaut False et label() lève ImportError.
+
+Les composantes trouvées sont les mêmes que celles des autres algorithmes,
+mais leur numérotation peut différer. Le temps mesuré inclut les
+conversions entre les listes Python des images du projet et les tableaux
+numpy attendus par OpenCV.
+
+Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
+"""
+
+import sys
+import os
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.image import Image, LabelImage
+
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+
+class OpenCVCCL:
+    """
+    Labellisation de référence par cv2.connectedComponents.
+
+    Même interface que les algorithmes du projet (label statique), pour
+    pouvoir être mesurée par les mêmes benchmarks.
+    """
+
+    @staticmethod
+    def label(input_image: Image, connectivity: int = 4,
+              out: Optional[LabelImage] = None) -> LabelImage:
+        """
+        Labellise les composantes connexes d'une image binaire.
+
+        Args:
+            input_image: Image binaire (0 = fond, 255 = objet)
+            connectivity: Type de connectivité (4 ou 8)
+            out: Image de labels à réutiliser (mêmes dimensions), évite
+                 une allocation par appel
+
+        Returns:
+            Image labellisée avec les composantes connexes
+
+        Raises:
+            ImportError: Si OpenCV n'est pas installé
+            ValueError: Si la connectivité n'est ni 4 ni 8
+        """
+        if not OPENCV_AVAILABLE:
+            raise ImportError("OpenCV requis pour OpenCVCCL : pip install opencv-python")
+        if connectivity not in (4, 8):
+            raise ValueError(f"Connectivite non supportee: {connectivity} (4 ou 8)")
+
+        labels = LabelImage(input_image.width, input_image.height) if out is None \
+            else out.reset_for(input_image)
+
+        if input_image.size == 0:
+            return labels
+
+        # Tout pixel non nul est "objet", comme pour les autres algorithmes
+        pixels = np.array(input_image.data, dtype=np.uint8)
+        _, cv_labels = cv2.connectedComponents(pixels, connectivity=connectivity,
+                                               ltype=cv2.CV_32S)
+
+        for label_row, cv_row in zip(labels.data, cv_labels.tolist()):
+            label_row[:] = cv_row
+
+        return labels
@@ -42,12 +42,20 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 
 import sys
 import os
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 from collections import deque
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.image import Image, LabelImage
-from utils.utils import get_neighbors
+
+
+# Décalages (dx, dy) de tous les voisins d'un pixel, par connectivité
+# (même ordre que get_neighbors)
+NEIGHBOR_OFFSETS = {
+    4: ((-1, 0), (1, 0), (0, 1), (0, -1)),
+    8: ((-1, -1), (-1, 0), (-1, 1), (0, -1),
+        (0, 1), (1, -1), (1, 0), (1, 1)),
+}
 
 
 class Prim:
@@ -63,13 +71,16 @@ class Prim:
     """
 
     @staticmethod
-    def label(input_image: Image, connectivity: int = 4) -> LabelImage:
+    def label(input_image: Image, connectivity: int = 4,
+              out: Optional[LabelImage] = None) -> LabelImage:
         """
         Labellise les composantes connexes d'une image binaire.
 
         Args:
             input_image: Image binaire (0 = fond, 255 = objet)
             connectivity: Type de connectivité (4 ou 8)
+            out: Image de labels à réutiliser (mêmes dimensions), évite
+                 une allocation par appel
 
         Returns:
             Image labellisée avec les composantes connexes
@@ -77,17 +88,21 @@ class Prim:
         width = input_image.width
         height = input_image.height
 
-        labels = LabelImage(width, height)
-        labels.fill(0)
+        labels = LabelImage(width, height) if out is None else out.reset_for(input_image)
         current_label = 0
 
         """
         Parcours de l'image : pour chaque pixel objet non labellisé,
         lancer un BFS pour explorer toute sa composante connexe.
         """
+        pixels = input_image.data
+        label_rows = labels.data
+
         for x in range(height):
+            row = pixels[x]
+            label_row = label_rows[x]
             for y in range(width):
-                if input_image.at(x, y) != 0 and labels.at(x, y) == 0:
+                if row[y] != 0 and label_row[y] == 0:
                     current_label += 1
                     Prim._bfs(input_image, labels, x, y, current_label, connectivity)
 
@@ -102,7 +117,7 @@ class Prim:
         BFS garantit :
         - Tous les pixels de la composante sont visités
         - Parcours par "couches" (bonne localité cache)
-        - Pas de risque de stack overflow (contrairement à DFS récursif)
+        - Pas de récursion, donc pas de risque de stack overflow
 
         Args:
             input_image: Image binaire
@@ -115,18 +130,33 @@ class Prim:
         width = input_image.width
         height = input_image.height
 
+        # Accès direct aux lignes ; les voisins viennent d'une table de
+        # décalages choisie une fois, bornes vérifiées sur place (pas de
+        # liste de voisins construite à chaque pixel défilé)
+        pixels = input_image.data
+        label_rows = labels.data
+        offsets = NEIGHBOR_OFFSETS.get(connectivity, ())
+
+        # deque (implémentée en C) plutôt qu'un tampon circulaire préalloué :
+        # en Python pur, les deux tableaux (lignes, colonnes) indexés à la
+        # main ou un tableau d'indices linéaires + divmod ne vont pas plus
+        # vite, et sont plus lents sur les grandes composantes
         queue = deque()
-        queue.append((start_x, start_y))
-        labels.set_at(start_x, start_y, label)
+        append = queue.append
+        popleft = queue.popleft
+        append((start_x, start_y))
+        label_rows[start_x][start_y] = label
 
         while queue:
-            x, y = queue.popleft()
-            neighbors = get_neighbors(x, y, width, height, connectivity)
+            x, y = popleft()
 
-            for nx, ny in neighbors:
-                if input_image.at(nx, ny) != 0 and labels.at(nx, ny) == 0:
-                    labels.set_at(nx, ny, label)
-                    queue.append((nx, ny))
+            for dx, dy in offsets:
+                nx = x + dx
+                ny = y + dy
+                if 0 <= nx < height and 0 <= ny < width:
+                    if pixels[nx][ny] != 0 and label_rows[nx][ny] == 0:
+                        label_rows[nx][ny] = label
+                        append((nx, ny))
 
     @staticmethod
     def _dfs(input_image: Image, labels: LabelImage,
@@ -134,9 +164,10 @@ class Prim:
         """
         Explore une composante connexe par parcours en profondeur (DFS).
 
-        Version récursive, plus simple mais :
-        - Risque de stack overflow pour de grandes composantes
-        - Moins bonne localité cache que BFS
+        Version itérative avec une pile explicite (LIFO) : pas de
+        récursion, donc ni RecursionError sur les grandes composantes ni
+        création d'un cadre d'appel par pixel. Un pixel est labellisé au
+        moment où il est empilé, il n'est donc empilé qu'une fois.
 
         Cette fonction est fournie comme alternative mais n'est pas
         utilisée par défaut (on préfère BFS).
@@ -144,8 +175,8 @@ class Prim:
         Args:
             input_image: Image binaire
             labels: Image de labels (modifiée)
-            x: Coordonnée ligne courante
-            y: Coordonnée colonne courante
+            x: Coordonnée ligne de départ
+            y: Coordonnée colonne de départ
             label: Label à affecter
             connectivity: Connectivité (4 ou 8)
         """
@@ -154,13 +185,26 @@ class Prim:
 
         if not labels.is_valid(x, y):
             return
-        if input_image.at(x, y) == 0:
-            return
-        if labels.at(x, y) != 0:
+
+        pixels = input_image.data
+        label_rows = labels.data
+        if pixels[x][y] == 0 or label_rows[x][y] != 0:
             return
 
-        labels.set_at(x, y, label)
-        neighbors = get_neighbors(x, y, width, height, connectivity)
+        offsets = NEIGHBOR_OFFSETS.get(connectivity, ())
+
+        label_rows[x][y] = label
+        stack = [(x, y)]
+        push = stack.append
+        pop = stack.pop
+
+        while stack:
+            x, y = pop()
 
-        for nx, ny in neighbors:
-            Prim._dfs(input_image, labels, nx, ny, label, connectivity)
+            for dx, dy in offsets:
+                nx = x + dx
+                ny = y + dy
+                if 0 <= nx < height and 0 <= ny < width:
+                    if pixels[nx][ny] != 0 and label_rows[nx][ny] == 0:
+                        label_rows[nx][ny] = label
+                        push((nx, ny))
@@ -21,7 +21,8 @@ Passe intermédiaire - Résolution des équivalences :
 
 2ème Passe - Relabellisation finale :
    - Parcours de l'image
-   - Remplacer chaque label provisoire par son label racine
+   - Remplacer chaque label provisoire par son label racine, renuméroté
+     de façon compacte (1, 2, 3...) via une table résolue une seule fois
 
 COMPLEXITÉ :
 - Temps: O(N) où N est le nombre de pixels (2 passes linéaires)
@@ -33,12 +34,19 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 
 import sys
 import os
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Tuple, Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.image import Image, LabelImage
 
 
+# Taille (en pixels) à partir de laquelle label(..., workers > 1) découpe
+# l'image en bandes : en dessous, le lancement des processus et le transfert
+# des données coûtent plus que le calcul
+PARALLEL_THRESHOLD = 1_000_000
+
+
 class EquivalenceTable:
     """
     Structure pour gérer les équivalences entre labels.
@@ -46,13 +54,38 @@ class EquivalenceTable:
     Implémente une version simplifiée d'Union-Find :
     - Chaque label pointe vers son "parent"
     - La racine d'un label est trouvée par remontée
-    - Path compression pour optimiser les recherches
+    - Path compression (division de chemin) pour optimiser les recherches
+    - Union par le plus petit label, sans rang ni taille : en labellisation,
+      la division de chemin suffit à garder les arbres plats, et un
+      tableau de rangs ne ferait qu'ajouter un accès mémoire par union.
+      La règle du minimum est conservée car la racine d'une classe est
+      alors toujours son plus petit label
     """
 
     def __init__(self):
         """Initialise la table d'équivalence. Label 0 réservé pour le fond."""
         self._parent = [0]
 
+    @classmethod
+    def from_parents(cls, parent: List[int]) -> 'EquivalenceTable':
+        """
+        Construit la table à partir d'un tableau de parents existant.
+
+        Args:
+            parent: Tableau des parents (parent[0] = 0 pour le fond,
+                    parent[i] <= i), repris tel quel sans copie
+
+        Returns:
+            Nouvelle table d'équivalence
+        """
+        table = cls()
+        table._parent = parent
+        return table
+
+    def parents(self) -> List[int]:
+        """Retourne le tableau des parents (sans copie)."""
+        return self._parent
+
     def make_set(self) -> int:
         """
         Crée un nouveau label.
@@ -66,7 +99,7 @@ class EquivalenceTable:
 
     def find(self, x: int) -> int:
         """
-        Trouve la racine d'un label (avec path compression).
+        Trouve la racine d'un label (itératif, avec division de chemin).
 
         Args:
             x: Label
@@ -74,13 +107,15 @@ class EquivalenceTable:
         Returns:
             Label racine
         """
-        if x <= 0 or x >= len(self._parent):
+        parent = self._parent
+        if x <= 0 or x >= len(parent):
             return 0
 
-        if self._parent[x] != x:
-            self._parent[x] = self.find(self._parent[x])
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
 
-        return self._parent[x]
+        return x
 
     def unite(self, x: int, y: int) -> None:
         """
@@ -93,16 +128,48 @@ class EquivalenceTable:
             x: Premier label
             y: Deuxième label
         """
-        root_x = self.find(x)
-        root_y = self.find(y)
+        # Recherches de racine (avec division de chemin) écrites en ligne,
+        # comme dans DisjointSet.unite : x et y sont des labels déjà créés,
+        # le contrôle de bornes de find est inutile ici
+        parent = self._parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        while parent[y] != y:
+            parent[y] = parent[parent[y]]
+            y = parent[y]
+
+        if x < y:
+            parent[y] = x
+        elif y < x:
+            parent[x] = y
+
+    def resolve(self) -> List[int]:
+        """
+        Calcule le label final de chaque label provisoire.
 
-        if root_x == root_y:
-            return
+        L'union par le minimum garantit parent[i] <= i : un seul parcours
+        croissant suffit, la racine de parent[i] étant déjà connue quand on
+        atteint i. Les racines sont numérotées 1, 2, 3... dans l'ordre de
+        création, ce qui donne des labels finaux compacts.
 
-        if root_x < root_y:
-            self._parent[root_y] = root_x
-        else:
-            self._parent[root_x] = root_y
+        Returns:
+            Table remap telle que remap[label provisoire] = label final
+            (remap[0] = 0 pour le fond)
+        """
+        parent = self._parent
+        remap = [0] * len(parent)
+        next_label = 1
+
+        for i in range(1, len(parent)):
+            root = parent[i]
+            if root == i:
+                remap[i] = next_label
+                next_label += 1
+            else:
+                remap[i] = remap[root]
+
+        return remap
 
     def size(self) -> int:
         """Retourne le nombre de labels."""
@@ -118,22 +185,39 @@ class TwoPass:
     """
 
     @staticmethod
-    def label(input_image: Image, connectivity: int = 4) -> LabelImage:
+    def label(input_image: Image, connectivity: int = 4,
+              out: Optional[LabelImage] = None, workers: int = 1) -> LabelImage:
         """
         Labellise les composantes connexes d'une image binaire.
 
         Args:
             input_image: Image binaire (0 = fond, 255 = objet)
             connectivity: Type de connectivité (4 ou 8)
+            out: Image de labels à réutiliser (mêmes dimensions), évite
+                 une allocation par appel
+            workers: Nombre de processus pour la première passe ; au-delà
+                     de 1, les images d'au moins PARALLEL_THRESHOLD pixels
+                     sont traitées par bandes (voir _label_strips)
 
         Returns:
             Image labellisée avec les composantes connexes
+
+        Raises:
+            ValueError: Si la connectivité n'est ni 4 ni 8
         """
+        # Vérifiée avant tout travail : le chemin par bandes s'exécute dans
+        # d'autres processus
+        if connectivity not in (4, 8):
+            raise ValueError(f"Connectivite non supportee: {connectivity} (4 ou 8)")
+
         width = input_image.width
         height = input_image.height
 
-        labels = LabelImage(width, height)
-        labels.fill(0)
+        labels = LabelImage(width, height) if out is None else out.reset_for(input_image)
+
+        if workers > 1 and width * height >= PARALLEL_THRESHOLD:
+            TwoPass._label_strips(input_image, labels, connectivity, workers)
+            return labels
 
         equiv = EquivalenceTable()
 
@@ -142,6 +226,97 @@ class TwoPass:
 
         return labels
 
+    @staticmethod
+    def _label_strips(input_image: Image, labels: LabelImage,
+                      connectivity: int, workers: int) -> None:
+        """
+        Labellise l'image découpée en bandes horizontales.
+
+        1. Chaque bande passe la première passe dans son propre processus,
+           avec ses propres labels provisoires (1, 2, 3...) et sa propre
+           table d'équivalence.
+        2. Les tables sont mises bout à bout : les labels de la bande k sont
+           décalés du nombre de labels des bandes précédentes, l'ordre de
+           création (haut en bas) est conservé.
+        3. Les équivalences entre la dernière ligne d'une bande et la
+           première de la suivante sont ajoutées dans le processus
+           principal (voir _merge_seam).
+        4. La deuxième passe traduit les labels de chaque bande avec sa
+           tranche de la table résolue.
+
+        Les labels finaux sont identiques à ceux du traitement séquentiel.
+
+        Args:
+            input_image: Image binaire
+            labels: Image de labels (sortie)
+            connectivity: Connectivité (4 ou 8)
+            workers: Nombre de processus (et de bandes)
+        """
+        height = input_image.height
+        pixels = input_image.data
+
+        # Premières lignes des bandes, réparties au plus juste
+        num_strips = min(workers, height)
+        starts = [height * k // num_strips for k in range(num_strips)]
+        bounds = list(zip(starts, starts[1:] + [height]))
+
+        with ProcessPoolExecutor(max_workers=num_strips) as executor:
+            strips = list(executor.map(
+                _first_pass_strip,
+                [pixels[start:end] for start, end in bounds],
+                [connectivity] * num_strips))
+
+        # Tables des bandes mises bout à bout (label 0 du fond partagé)
+        parent = [0]
+        label_offsets = []
+        for _, strip_parent in strips:
+            offset = len(parent) - 1
+            label_offsets.append(offset)
+            parent.extend(map(offset.__add__, strip_parent[1:]))
+        equiv = EquivalenceTable.from_parents(parent)
+
+        for k in range(1, num_strips):
+            TwoPass._merge_seam(strips[k - 1][0][-1], label_offsets[k - 1],
+                                strips[k][0][0], label_offsets[k],
+                                connectivity, equiv.unite)
+
+        remap = equiv.resolve()
+        label_rows = iter(labels.data)
+        for (strip_labels, strip_parent), offset in zip(strips, label_offsets):
+            # Tranche de la table pour les labels locaux de la bande
+            strip_remap = [0] + remap[offset + 1:offset + len(strip_parent)]
+            label_of = strip_remap.__getitem__
+            for strip_row, label_row in zip(strip_labels, label_rows):
+                label_row[:] = map(label_of, strip_row)
+
+    @staticmethod
+    def _merge_seam(upper: List[int], upper_offset: int,
+                    lower: List[int], lower_offset: int,
+                    connectivity: int, unite: Callable[[int, int], None]) -> None:
+        """
+        Enregistre les équivalences à la frontière entre deux bandes.
+
+        Args:
+            upper: Labels provisoires de la dernière ligne de la bande du haut
+            upper_offset: Décalage des labels de la bande du haut
+            lower: Labels provisoires de la première ligne de la bande du bas
+            lower_offset: Décalage des labels de la bande du bas
+            connectivity: Connectivité (4 ou 8)
+            unite: Union de la table d'équivalence globale
+        """
+        width = len(lower)
+        # Voisins du haut : Nord seul (4-conn), ou Nord-Ouest/Nord/Nord-Est
+        columns = (0,) if connectivity == 4 else (-1, 0, 1)
+
+        for y in range(width):
+            if lower[y] == 0:
+                continue
+            current = lower[y] + lower_offset
+            for dy in columns:
+                ny = y + dy
+                if 0 <= ny < width and upper[ny] != 0:
+                    unite(current, upper[ny] + upper_offset)
+
     @staticmethod
     def _first_pass(input_image: Image, labels: LabelImage,
                     equiv: EquivalenceTable, connectivity: int) -> None:
@@ -163,107 +338,161 @@ class TwoPass:
             labels: Image de labels (sortie)
             equiv: Table d'équivalence (sortie)
             connectivity: Connectivité (4 ou 8)
+
+        Raises:
+            ValueError: Si la connectivité n'est ni 4 ni 8
+        """
+        # Connectivité testée une fois : chaque version spécialisée lit ses
+        # voisins en dur, sans table de décalages ni boucle par voisin
+        if connectivity == 4:
+            TwoPass._first_pass_4(input_image, labels, equiv)
+        elif connectivity == 8:
+            TwoPass._first_pass_8(input_image, labels, equiv)
+        else:
+            raise ValueError(f"Connectivite non supportee: {connectivity} (4 ou 8)")
+
+    @staticmethod
+    def _first_pass_4(input_image: Image, labels: LabelImage,
+                      equiv: EquivalenceTable) -> None:
+        """
+        Première passe spécialisée pour la connectivité 4 (voisins Nord et
+        Ouest).
+
+        Les pixels de fond reçoivent le label 0 : le label d'un voisin est
+        donc non nul si et seulement si ce voisin est un pixel objet, et il
+        suffit de lire la ligne de labels.
+
+        Args:
+            input_image: Image binaire
+            labels: Image de labels (sortie)
+            equiv: Table d'équivalence (sortie)
         """
         width = input_image.width
         height = input_image.height
 
+        # Accès direct aux lignes : pas de at()/set_at() (bornes déjà garanties)
+        pixels = input_image.data
+        label_rows = labels.data
+        # Méthodes de la table liées une fois, hors de la boucle par pixel
+        make_set = equiv.make_set
+        unite = equiv.unite
+        # Ligne "au-dessus" de la première : que du fond
+        prev_labels = [0] * width
+
         for x in range(height):
+            row = pixels[x]
+            label_row = label_rows[x]
+            west = 0
             for y in range(width):
-                if input_image.at(x, y) == 0:
-                    labels.set_at(x, y, 0)
+                if row[y] == 0:
+                    label_row[y] = west = 0
                     continue
 
-                neighbors = TwoPass._get_previous_neighbors(x, y, width, height, connectivity)
+                north = prev_labels[y]
+                if west == 0:
+                    west = north if north else make_set()
+                elif north and north != west:
+                    # Collision : le plus petit label l'emporte
+                    if north < west:
+                        unite(north, west)
+                        west = north
+                    else:
+                        unite(west, north)
+                label_row[y] = west
 
-                neighbor_labels = []
-                for nx, ny in neighbors:
-                    if input_image.at(nx, ny) != 0:
-                        neighbor_label = labels.at(nx, ny)
-                        if neighbor_label > 0:
-                            neighbor_labels.append(neighbor_label)
+            prev_labels = label_row
+
+    @staticmethod
+    def _first_pass_8(input_image: Image, labels: LabelImage,
+                      equiv: EquivalenceTable) -> None:
+        """
+        Première passe spécialisée pour la connectivité 8 (voisins
+        Nord-Ouest, Nord, Nord-Est et Ouest).
+
+        Args:
+            input_image: Image binaire
+            labels: Image de labels (sortie)
+            equiv: Table d'équivalence (sortie)
+        """
+        width = input_image.width
+        height = input_image.height
 
-                if not neighbor_labels:
-                    new_label = equiv.make_set()
-                    labels.set_at(x, y, new_label)
-                else:
-                    min_label = neighbor_labels[0]
-                    for i in range(1, len(neighbor_labels)):
-                        if neighbor_labels[i] < min_label:
-                            min_label = neighbor_labels[i]
+        pixels = input_image.data
+        label_rows = labels.data
+        make_set = equiv.make_set
+        unite = equiv.unite
+        # Ligne de labels précédente bordée d'un 0 à chaque extrémité :
+        # prev[y], prev[y + 1], prev[y + 2] sont les voisins Nord-Ouest,
+        # Nord et Nord-Est de la colonne y, sans test de bornes
+        prev = [0] * (width + 2)
 
-                    labels.set_at(x, y, min_label)
+        for x in range(height):
+            row = pixels[x]
+            label_row = label_rows[x]
+            west = 0
+            for y in range(width):
+                if row[y] == 0:
+                    label_row[y] = west = 0
+                    continue
 
-                    for i in range(len(neighbor_labels)):
-                        if neighbor_labels[i] != min_label:
-                            equiv.unite(min_label, neighbor_labels[i])
+                current = west
+                for neighbor in (prev[y], prev[y + 1], prev[y + 2]):
+                    if neighbor and neighbor != current:
+                        if current == 0:
+                            current = neighbor
+                        elif neighbor < current:
+                            unite(neighbor, current)
+                            current = neighbor
+                        else:
+                            unite(current, neighbor)
+                if current == 0:
+                    current = make_set()
+                label_row[y] = west = current
+
+            prev[1:width + 1] = label_row
 
     @staticmethod
     def _second_pass(labels: LabelImage, equiv: EquivalenceTable) -> None:
         """
         Deuxième passe : relabellisation avec les labels racine.
 
-        Remplace chaque label provisoire par son label racine
-        (résolution des équivalences).
+        Remplace chaque label provisoire par le label (compact) de sa
+        racine (résolution des équivalences).
 
         Cette passe garantit que tous les pixels d'une même composante
         connexe auront exactement le même label final.
 
+        La table est résolue une fois (EquivalenceTable.resolve), puis
+        chaque ligne est réécrite par une simple indexation dans la table :
+        plus aucun appel à find par pixel.
+
         Args:
             labels: Image de labels (entrée/sortie)
             equiv: Table d'équivalence
         """
-        width = labels.width
-        height = labels.height
-
-        for x in range(height):
-            for y in range(width):
-                label = labels.at(x, y)
-                if label > 0:
-                    labels.set_at(x, y, equiv.find(label))
-
-    @staticmethod
-    def _get_previous_neighbors(x: int, y: int, width: int, height: int,
-                                 connectivity: int) -> List[Tuple[int, int]]:
-        """
-        Retourne les voisins déjà traités dans un parcours gauche->droite, haut->bas.
-
-        Pour la connectivité 4 :
-            [X]     <- Nord (x-1, y) : déjà traité
-          [X][P]    <- Ouest (x, y-1) : déjà traité, Pixel courant (P)
+        remap = equiv.resolve().__getitem__
 
-        Pour la connectivité 8 :
-          [X][X][X]  <- Nord-Ouest, Nord, Nord-Est : déjà traités
-          [X][P]     <- Ouest : déjà traité, Pixel courant (P)
+        for label_row in labels.data:
+            label_row[:] = map(remap, label_row)
 
-        Cette optimisation évite d'examiner les voisins pas encore traités,
-        ce qui améliore la localité cache.
 
-        Args:
-            x: Coordonnée ligne
-            y: Coordonnée colonne
-            width: Largeur
-            height: Hauteur
-            connectivity: Connectivité
-
-        Returns:
-            Liste de tuples (x, y) des voisins déjà parcourus
-        """
-        neighbors = []
+def _first_pass_strip(rows: List[List[int]],
+                      connectivity: int) -> Tuple[List[List[int]], List[int]]:
+    """
+    Première passe sur une bande de lignes (voir TwoPass._label_strips).
+    Fonction de module : exécutée dans un processus de travail.
 
-        if connectivity == 4:
-            if x > 0:
-                neighbors.append((x - 1, y))
-            if y > 0:
-                neighbors.append((x, y - 1))
+    Args:
+        rows: Lignes de pixels de la bande
+        connectivity: Connectivité (4 ou 8)
 
-        elif connectivity == 8:
-            if x > 0 and y > 0:
-                neighbors.append((x - 1, y - 1))
-            if x > 0:
-                neighbors.append((x - 1, y))
-            if x > 0 and y < width - 1:
-                neighbors.append((x - 1, y + 1))
-            if y > 0:
-                neighbors.append((x, y - 1))
-
-        return neighbors
+    Returns:
+        (labels provisoires de la bande, tableau des parents de sa table
+        d'équivalence)
+    """
+    strip = Image()
+    strip.data = rows
+    labels = LabelImage(strip.width, strip.height)
+    equiv = EquivalenceTable()
+    TwoPass._first_pass(strip, labels, equiv, connectivity)
+    return labels.data, equiv.parents()
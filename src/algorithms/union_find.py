@@ -25,8 +25,9 @@ Cette structure maintient une partition de l'ensemble des pixels.
 Chaque partition représente une composante connexe.
 
 OPTIMISATIONS :
-- Path compression : lors de Find, faire pointer tous les noeuds
-  parcourus directement vers la racine
+- Compression de chemin (path halving) : lors de Find, faire pointer
+  chaque noeud parcouru vers son grand-parent (même complexité que la
+  compression complète, sans récursion)
 - Union by rank : lors de Union, attacher l'arbre de rang inférieur
   sous l'arbre de rang supérieur
 
@@ -39,7 +40,8 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 
 import sys
 import os
-from typing import List
+from itertools import compress
+from typing import List, Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.image import Image, LabelImage
@@ -50,7 +52,7 @@ class DisjointSet:
     Structure Union-Find optimisée.
 
     Implémente la structure de données Disjoint-Set avec :
-    - Path compression dans Find
+    - Path compression (division de chemin) dans Find
     - Union by rank
     """
 
@@ -68,9 +70,10 @@ class DisjointSet:
         """
         Trouve le représentant de l'ensemble contenant x.
 
-        Utilise la path compression : tous les noeuds parcourus
-        sont directement reliés à la racine pour accélérer les
-        futurs Find.
+        Utilise la division de chemin (path halving) : chaque noeud
+        parcouru est rattaché à son grand-parent, ce qui aplatit l'arbre
+        pour les futurs Find. La version itérative évite la récursion
+        (et la RecursionError sur les longues chaînes).
 
         Args:
             x: Élément
@@ -78,9 +81,11 @@ class DisjointSet:
         Returns:
             Représentant (racine) de l'ensemble
         """
-        if self._parent[x] != x:
-            self._parent[x] = self.find(self._parent[x])
-        return self._parent[x]
+        parent = self._parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
 
     def unite(self, x: int, y: int) -> bool:
         """
@@ -96,19 +101,28 @@ class DisjointSet:
         Returns:
             True si fusion effectuée, False si déjà dans le même ensemble
         """
-        root_x = self.find(x)
-        root_y = self.find(y)
-
-        if root_x == root_y:
+        # Les deux recherches de racine (avec division de chemin) sont
+        # écrites en ligne : unite est appelée pour chaque paire de
+        # voisins, deux appels de méthode en moins par union
+        parent = self._parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        while parent[y] != y:
+            parent[y] = parent[parent[y]]
+            y = parent[y]
+
+        if x == y:
             return False
 
-        if self._rank[root_x] < self._rank[root_y]:
-            self._parent[root_x] = root_y
-        elif self._rank[root_x] > self._rank[root_y]:
-            self._parent[root_y] = root_x
+        rank = self._rank
+        if rank[x] < rank[y]:
+            parent[x] = y
+        elif rank[x] > rank[y]:
+            parent[y] = x
         else:
-            self._parent[root_y] = root_x
-            self._rank[root_x] += 1
+            parent[y] = x
+            rank[x] += 1
 
         return True
 
@@ -124,13 +138,16 @@ class UnionFind:
     """
 
     @staticmethod
-    def label(input_image: Image, connectivity: int = 4) -> LabelImage:
+    def label(input_image: Image, connectivity: int = 4,
+              out: Optional[LabelImage] = None) -> LabelImage:
         """
         Labellise les composantes connexes d'une image binaire.
 
         Args:
             input_image: Image binaire (0 = fond, 255 = objet)
             connectivity: Type de connectivité (4 ou 8)
+            out: Image de labels à réutiliser (mêmes dimensions), évite
+                 une allocation par appel
 
         Returns:
             Image labellisée avec les composantes connexes
@@ -140,8 +157,7 @@ class UnionFind:
         size = width * height
 
         ds = DisjointSet(size)
-        labels = LabelImage(width, height)
-        labels.fill(0)
+        labels = LabelImage(width, height) if out is None else out.reset_for(input_image)
 
         """
         Phase 1 : Union des pixels adjacents
@@ -149,28 +165,36 @@ class UnionFind:
         + diagonales Nord-Ouest/Nord-Est pour 8-conn) pour éviter
         de traiter deux fois la même paire.
         """
-        for x in range(height):
-            for y in range(width):
-                if input_image.at(x, y) == 0:
-                    continue
+        pixels = input_image.data
+        columns = range(width)
 
-                current_idx = UnionFind._get_index(x, y, width)
+        for x in range(height):
+            row = pixels[x]
+            # Ligne précédente (déjà parcourue), absente pour la première ligne
+            prev_row = pixels[x - 1] if x > 0 else None
+            # Index linéaire du premier pixel de la ligne : les voisins
+            # s'en déduisent par décalage, sans recalcul x * width + y
+            base = x * width
+            # Seuls les pixels "objet" sont visités (le fond est sauté en C)
+            for y in compress(columns, row):
+                current_idx = base + y
+                north_idx = current_idx - width
 
                 if connectivity == 4:
-                    if x > 0 and input_image.at(x - 1, y) != 0:
-                        ds.unite(current_idx, UnionFind._get_index(x - 1, y, width))
-                    if y > 0 and input_image.at(x, y - 1) != 0:
-                        ds.unite(current_idx, UnionFind._get_index(x, y - 1, width))
+                    if x > 0 and prev_row[y] != 0:
+                        ds.unite(current_idx, north_idx)
+                    if y > 0 and row[y - 1] != 0:
+                        ds.unite(current_idx, current_idx - 1)
 
                 elif connectivity == 8:
-                    if x > 0 and y > 0 and input_image.at(x - 1, y - 1) != 0:
-                        ds.unite(current_idx, UnionFind._get_index(x - 1, y - 1, width))
-                    if x > 0 and input_image.at(x - 1, y) != 0:
-                        ds.unite(current_idx, UnionFind._get_index(x - 1, y, width))
-                    if x > 0 and y < width - 1 and input_image.at(x - 1, y + 1) != 0:
-                        ds.unite(current_idx, UnionFind._get_index(x - 1, y + 1, width))
-                    if y > 0 and input_image.at(x, y - 1) != 0:
-                        ds.unite(current_idx, UnionFind._get_index(x, y - 1, width))
+                    if x > 0 and y > 0 and prev_row[y - 1] != 0:
+                        ds.unite(current_idx, north_idx - 1)
+                    if x > 0 and prev_row[y] != 0:
+                        ds.unite(current_idx, north_idx)
+                    if x > 0 and y < width - 1 and prev_row[y + 1] != 0:
+                        ds.unite(current_idx, north_idx + 1)
+                    if y > 0 and row[y - 1] != 0:
+                        ds.unite(current_idx, current_idx - 1)
 
         """
         Phase 2 : Labellisation finale
@@ -180,34 +204,21 @@ class UnionFind:
         root_to_label = [0] * size
         next_label = 1
 
-        for x in range(height):
-            for y in range(width):
-                if input_image.at(x, y) == 0:
-                    labels.set_at(x, y, 0)
-                    continue
+        pixels = input_image.data
+        label_rows = labels.data
 
-                idx = UnionFind._get_index(x, y, width)
-                root = ds.find(idx)
+        for x in range(height):
+            row = pixels[x]
+            label_row = label_rows[x]
+            base = x * width
+            # Le fond garde son label 0 (image de labels remise à 0)
+            for y in compress(columns, row):
+                root = ds.find(base + y)
 
                 if root_to_label[root] == 0:
                     root_to_label[root] = next_label
                     next_label += 1
 
-                labels.set_at(x, y, root_to_label[root])
+                label_row[y] = root_to_label[root]
 
         return labels
-
-    @staticmethod
-    def _get_index(x: int, y: int, width: int) -> int:
-        """
-        Convertit les coordonnées 2D en index 1D.
-
-        Args:
-            x: Coordonnée ligne
-            y: Coordonnée colonne
-            width: Largeur de l'image
-
-        Returns:
-            Index linéaire
-        """
-        return x * width + y
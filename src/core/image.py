@@ -11,6 +11,7 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 """
 
 from dataclasses import dataclass
+from itertools import chain
 from typing import List, Optional
 
 
@@ -221,6 +222,40 @@ class LabelImage:
         else:
             self._labels = []
 
+    @classmethod
+    def empty_like(cls, image: 'Image') -> 'LabelImage':
+        """
+        Crée une image de labels vide (tout à 0) aux dimensions d'une image.
+
+        Args:
+            image: Image de référence
+
+        Returns:
+            Nouvelle image de labels
+        """
+        return cls(image.width, image.height)
+
+    def reset_for(self, image: 'Image') -> 'LabelImage':
+        """
+        Prépare ce buffer pour labelliser `image` (réutilisation sans
+        nouvelle allocation).
+
+        Args:
+            image: Image qui va être labellisée
+
+        Returns:
+            Cette image de labels, remise à 0
+
+        Raises:
+            ValueError: Si les dimensions ne correspondent pas
+        """
+        if self._width != image.width or self._height != image.height:
+            raise ValueError(
+                f"Dimensions du buffer de sortie ({self._width}x{self._height}) "
+                f"differentes de l'image ({image.width}x{image.height})")
+        self.fill(0)
+        return self
+
     @property
     def width(self) -> int:
         """Largeur de l'image."""
@@ -300,9 +335,9 @@ class LabelImage:
         Args:
             value: Valeur à affecter à tous les labels
         """
-        for x in range(self._height):
-            for y in range(self._width):
-                self._labels[x][y] = value
+        row_values = [value] * self._width
+        for row in self._labels:
+            row[:] = row_values
 
     def count_labels(self) -> int:
         """
@@ -311,12 +346,12 @@ class LabelImage:
         Returns:
             Nombre de composantes connexes
         """
+        # Une ligne entiere par appel a set.update : la boucle par pixel
+        # s'execute en C, le fond (0) est retire a la fin
         seen = set()
-        for x in range(self._height):
-            for y in range(self._width):
-                label = self._labels[x][y]
-                if label > 0:
-                    seen.add(label)
+        for row in self._labels:
+            seen.update(row)
+        seen.discard(0)
         return len(seen)
 
     def to_visualization(self) -> Image:
@@ -329,24 +364,19 @@ class LabelImage:
         """
         result = Image(self._width, self._height)
 
-        max_label = 0
-        for x in range(self._height):
-            for y in range(self._width):
-                if self._labels[x][y] > max_label:
-                    max_label = self._labels[x][y]
+        max_label = max(chain.from_iterable(self._labels), default=0)
 
         if max_label == 0:
             result.fill(0)
             return result
 
-        for x in range(self._height):
-            for y in range(self._width):
-                label = self._labels[x][y]
-                if label == 0:
-                    result.set_at(x, y, 0)
-                else:
-                    value = ((label * 254) // max_label) + 1
-                    result.set_at(x, y, value)
+        # Niveau de gris de chaque label calculé une fois, puis chaque ligne
+        # traduite par un seul map (pas de set_at par pixel)
+        gray_lut = [0] + [((label * 254) // max_label) + 1
+                          for label in range(1, max_label + 1)]
+        gray_of = gray_lut.__getitem__
+        for label_row, gray_row in zip(self._labels, result.data):
+            gray_row[:] = map(gray_of, label_row)
 
         return result
 
@@ -363,11 +393,8 @@ class LabelImage:
         """
         result = ColorImage(self._width, self._height)
 
-        unique_labels = set()
-        for x in range(self._height):
-            for y in range(self._width):
-                if self._labels[x][y] > 0:
-                    unique_labels.add(self._labels[x][y])
+        unique_labels = set(chain.from_iterable(self._labels))
+        unique_labels.discard(0)
 
         if not unique_labels:
             return result
@@ -389,13 +416,11 @@ class LabelImage:
 
             color_lut[label] = (r, g, b)
 
-        for x in range(self._height):
-            for y in range(self._width):
-                label = self._labels[x][y]
-                if label == 0:
-                    result.set_at(x, y, (0, 0, 0))
-                else:
-                    result.set_at(x, y, color_lut[label])
+        # Le fond (label 0) reste noir ; une ligne = un seul map
+        color_lut[0] = (0, 0, 0)
+        color_of = color_lut.__getitem__
+        for label_row, color_row in zip(self._labels, result.data):
+            color_row[:] = map(color_of, label_row)
 
         return result
 
@@ -12,6 +12,7 @@ Auteurs : Romain Despoullain, Nicolas Marano, Amin Braham
 """
 
 import numpy as np
+from itertools import chain
 from pathlib import Path
 from typing import BinaryIO, List
 import sys
@@ -86,14 +87,11 @@ class ImageIO:
     def _numpy_array_to_list2d(arr, height: int, width: int) -> List[List[int]]:
         """
         Convertit un array numpy 1D en liste Python 2D.
+
+        tolist() construit directement les lignes (entiers Python) à leur
+        taille finale, sans append ni int() par pixel.
         """
-        result = []
-        for x in range(height):
-            row = []
-            for y in range(width):
-                row.append(int(arr[x * width + y]))
-            result.append(row)
-        return result
+        return arr.reshape(height, width).tolist()
 
     @staticmethod
     def _cv2_array_to_list2d(arr) -> List[List[int]]:
@@ -109,15 +107,9 @@ class ImageIO:
         Returns:
             Liste 2D Python
         """
-        height = arr.shape[0]
-        width = arr.shape[1]
-        result = []
-        for x in range(height):
-            row = []
-            for y in range(width):
-                row.append(int(arr[x, y]))
-            result.append(row)
-        return result
+        # tolist() construit directement les lignes (entiers Python) à leur
+        # taille finale, sans append ni int() par pixel
+        return arr.tolist()
 
     @staticmethod
     def read_with_opencv(filename: str) -> Image:
@@ -208,16 +200,16 @@ class ImageIO:
             if binary:
                 header = f"P5\n# Created by Labellisation Project\n{image.width} {image.height}\n{image.max_value}\n"
                 file.write(header.encode('ascii'))
-                for x in range(image.height):
-                    for y in range(image.width):
-                        file.write(bytes([image.at(x, y)]))
+                # Une écriture par ligne (un octet par pixel)
+                for row in image.data:
+                    file.write(bytes(row))
             else:
                 header = f"P2\n# Created by Labellisation Project\n{image.width} {image.height}\n{image.max_value}\n"
                 file.write(header.encode('ascii'))
                 count = 0
-                for x in range(image.height):
-                    for y in range(image.width):
-                        file.write(f"{image.at(x, y)} ".encode('ascii'))
+                for row in image.data:
+                    for value in row:
+                        file.write(f"{value} ".encode('ascii'))
                         count += 1
                         if count % 16 == 0:
                             file.write(b"\n")
@@ -290,17 +282,16 @@ class ImageIO:
             if binary:
                 header = f"P6\n# Created by Labellisation Project\n{image.width} {image.height}\n{image.max_value}\n"
                 file.write(header.encode('ascii'))
-                for x in range(image.height):
-                    for y in range(image.width):
-                        value = image.at(x, y)
-                        file.write(bytes([value, value, value]))
+                # Une écriture par ligne : chaque niveau de gris répété
+                # sur les trois canaux
+                for row in image.data:
+                    file.write(bytes(chain.from_iterable(zip(row, row, row))))
             else:
                 header = f"P3\n# Created by Labellisation Project\n{image.width} {image.height}\n{image.max_value}\n"
                 file.write(header.encode('ascii'))
                 count = 0
-                for x in range(image.height):
-                    for y in range(image.width):
-                        value = image.at(x, y)
+                for row in image.data:
+                    for value in row:
                         file.write(f"{value} {value} {value} ".encode('ascii'))
                         count += 1
                         if count % 5 == 0:
@@ -320,12 +311,8 @@ class ImageIO:
                 "OpenCV n'est pas installe. Installez-le avec: pip install opencv-python"
             )
 
-        height = image.height
-        width = image.width
-        arr = np.zeros((height, width), dtype=np.uint8)
-        for x in range(height):
-            for y in range(width):
-                arr[x, y] = image.at(x, y)
+        # Conversion des listes en tableau en un seul appel
+        arr = np.array(image.data, dtype=np.uint8).reshape(image.height, image.width)
 
         cv2.imwrite(filename, arr)
 
@@ -429,17 +416,15 @@ class ImageIO:
             if binary:
                 header = f"P6\n# Color visualization - Labellisation Project\n{color_image.width} {color_image.height}\n255\n"
                 file.write(header.encode('ascii'))
-                for x in range(color_image.height):
-                    for y in range(color_image.width):
-                        r, g, b = color_image.at(x, y)
-                        file.write(bytes([r, g, b]))
+                # Une écriture par ligne (triplets R, G, B mis bout à bout)
+                for row in color_image.data:
+                    file.write(bytes(chain.from_iterable(row)))
             else:
                 header = f"P3\n# Color visualization - Labellisation Project\n{color_image.width} {color_image.height}\n255\n"
                 file.write(header.encode('ascii'))
                 count = 0
-                for x in range(color_image.height):
-                    for y in range(color_image.width):
-                        r, g, b = color_image.at(x, y)
+                for row in color_image.data:
+                    for r, g, b in row:
                         file.write(f"{r} {g} {b} ".encode('ascii'))
                         count += 1
                         if count % 5 == 0:
@@ -459,13 +444,10 @@ class ImageIO:
                 "OpenCV n'est pas installe. Utilisez le format PPM ou installez OpenCV."
             )
 
-        height = color_image.height
-        width = color_image.width
-
-        arr = np.zeros((height, width, 3), dtype=np.uint8)
-        for x in range(height):
-            for y in range(width):
-                r, g, b = color_image.at(x, y)
-                arr[x, y] = [b, g, r]
+        # Conversion des listes en tableau en un seul appel, puis
+        # inversion des canaux (OpenCV attend l'ordre B, G, R)
+        rgb = np.array(color_image.data, dtype=np.uint8).reshape(
+            color_image.height, color_image.width, 3)
+        arr = np.ascontiguousarray(rgb[:, :, ::-1])
 
         cv2.imwrite(filename, arr)